@@ -0,0 +1,314 @@
+"""Benchmark de latência por estágio do pipeline percepção -> comando.
+
+Roda o pipeline do TDP_tello.py (process_frame) e o GestureControl.update das
+variantes de missão sobre um vídeo gravado, com um drone falso (StubTello), e
+mostra p50/p95/p99 por estágio e o FPS sustentado.
+
+    python Nosso_codigo/benchmark.py --video voo.mp4 --frames 300 --headless
+    python Nosso_codigo/benchmark.py --video voo.mp4 --json atual.json --baseline anterior.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import time
+
+import cv2
+
+from capture import CaptureThread
+from dispatcher import CommandDispatcher
+from flight_log import FlightLog, log_path
+from gesture_classifier import GESTURES
+from perf import StageTimer, TimedProxy
+from rc_control import RcStreamer
+from telemetry import TelemetryCache
+from tello_sim import StubTello
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+PIPELINES = {
+    "tdp": os.path.join(ROOT, "TDP_tello.py"),
+    "missao_4": os.path.join(HERE, "missao_4.py"),
+    "missao4-v2": os.path.join(HERE, "missao4-v2.py"),
+    "missao4-v3": os.path.join(HERE, "missao4-v3.py"),
+}
+
+MOVE_METHODS = ("move_up", "move_down", "move_left", "move_right", "send_rc_control")
+
+HEADLESS_OVERRIDES = {
+    "imshow": lambda *args: None,
+    "waitKey": lambda *args: -1,
+    "destroyAllWindows": lambda *args: None,
+}
+
+
+def load_module(path, name):
+    # Os arquivos das missões têm hífen no nome, então não dá para usar import
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BenchVar:
+    """Imita as variáveis do Tk (get/set) usadas pela GUI."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class BenchGui:
+    def __init__(self, args):
+        # Taxa de quadros alta para não limitar o update artificialmente
+        self.frame_rate = BenchVar(1000)
+        self.resolution = BenchVar(args.resolution)
+        self.detection_confidence = BenchVar(0.7)
+        self.skip_frames = BenchVar(0)
+        self.draw_landmarks = BenchVar(True)
+        self.move_distance = BenchVar(20)
+        self.stabilize_time = BenchVar(0.0)
+        self.tick_interval = BenchVar(0.0)
+        self.gesture_window = BenchVar(5)
+        self.gesture_votes = BenchVar(3)
+        self.inference_workers = BenchVar(args.workers)
+        self.roi_tracking = BenchVar(args.roi)
+        self.record_video = BenchVar(args.record)
+        self.auto_quality = BenchVar(args.auto_quality)
+        self.latency_budget = BenchVar(args.budget)
+        self.measured_latency = BenchVar("-")
+        self.measured_fps = BenchVar("-")
+        self.rc_mode = BenchVar(args.rc)
+        self.rc_speed = BenchVar(40)
+
+
+def make_drone(args):
+    drone = StubTello(args.video, latency=args.latency, fps=args.stream_fps or None,
+                      move_speed=args.move_speed)
+    drone.connect()
+    drone.takeoff()
+    return drone
+
+
+def timed_frame_read(drone, timer):
+    # Só para quem lê o quadro no próprio loop; com a CaptureThread, quem lê é a
+    # thread produtora e o estágio medido é a leitura do consumidor ("captura")
+    drone.background_frame_read = TimedProxy(drone.get_frame_read(), timer,
+                                             {"frame": "get_frame_read().frame"})
+    return drone.background_frame_read
+
+
+class TimedPoll:
+    """Mede o poll() da CaptureThread só quando ele entrega um quadro novo; os ticks
+    que repetem o quadro anterior retornam logo e, como no "total", não contam."""
+
+    def __init__(self, capture, timer):
+        self._capture = capture
+        self._timer = timer
+        self._last_seq = -1
+
+    def __getattr__(self, name):
+        return getattr(self._capture, name)
+
+    def poll(self, *args, **kwargs):
+        start = time.perf_counter()
+        packet = self._capture.poll(*args, **kwargs)
+        if packet is not None and packet.seq != self._last_seq:
+            self._last_seq = packet.seq
+            self._timer.add("captura", time.perf_counter() - start)
+        return packet
+
+
+def cv2_proxy(timer, args):
+    overrides = HEADLESS_OVERRIDES if args.headless else None
+    return TimedProxy(cv2, timer, {"cvtColor": "cvtColor", "resize": "resize", "imshow": "imshow"},
+                      overrides)
+
+
+def bench_tdp(args, timer):
+    tdp = load_module(PIPELINES["tdp"], "TDP_tello")
+    tdp.create_perception()
+    drone = make_drone(args)
+    frame_read = drone.get_frame_read()
+
+    tdp.tello = TimedProxy(drone, timer, {"send_command_with_return": "send_command_with_return"})
+    tdp.telemetry = TelemetryCache(drone).start()
+    if args.flight_log:
+        flight_log = FlightLog(log_path("bench_tdp"), GESTURES, tdp.telemetry).open()
+        tdp.flight_log = TimedProxy(flight_log, timer, {"log_frame": "flight_log"})
+    tdp.dispatcher = CommandDispatcher(tdp.tello, on_response=tdp.handle_response).start()
+    tdp.hands = TimedProxy(tdp.hands, timer, {"process": "hands.process"})
+    tdp.ROI_TRACKING = args.roi
+    tdp.roi_tracker.hands = tdp.hands
+    tdp.RC_MODE = args.rc
+    if args.rc:
+        tdp.rc = RcStreamer(drone, on_send=flight_log.log_rc if args.flight_log else None).start()
+    tdp.cv2 = cv2_proxy(timer, args)
+    detect_gesture = tdp.detect_gesture
+
+    def timed_detect_gesture(landmarks):
+        with timer.stage("detect_gesture"):
+            return detect_gesture(landmarks)
+    tdp.detect_gesture = timed_detect_gesture
+
+    # Mesmo loop do main() do TDP_tello.py
+    tdp.display.start()
+    capture = CaptureThread(frame_read).start()
+    last_seq = -1
+    while timer.frames < args.frames:
+        with timer.stage("captura"):
+            packet = capture.read(last_seq, timeout=1.0)
+        if packet is None:
+            break
+        last_seq = packet.seq
+        with timer.stage("total"):
+            frame = tdp.process_frame(packet.frame, packet.seq)
+            tdp.display.show(frame)
+        timer.frame()
+
+    capture.stop()
+    tdp.display.stop()
+    tdp.dispatcher.stop()
+    tdp.telemetry.stop()
+    extra = []
+    if args.roi:
+        extra.append(tdp.roi_tracker.summary())
+    if args.rc:
+        tdp.rc.stop()
+        extra.append(tdp.rc.summary())
+    if args.flight_log:
+        flight_log.close()
+        extra.append(flight_log.summary())
+    drone.end()
+    return "\n".join(extra)
+
+
+def bench_mission(name, args, timer):
+    mission = load_module(PIPELINES[name], name)
+    drone = make_drone(args)
+
+    gesture_control = mission.GestureControl(gui=BenchGui(args))
+    flight_log = timed_log = on_response = None
+    if args.flight_log:
+        labels = [zone or "none" for zone in getattr(mission, "ZONES", ())]
+        flight_log = FlightLog(log_path(f"bench_{name}"), labels, TelemetryCache(drone).start()).open()
+        timed_log = TimedProxy(flight_log, timer, {"log_frame": "flight_log"})
+        on_response = flight_log.log_command
+    # missao4-v3 manda os movimentos pelo despachante; as outras chamam o drone direto
+    dispatcher = CommandDispatcher(
+        TimedProxy(drone, timer, {"send_command_with_return": "comando"}), on_response=on_response).start()
+    gesture_control.setup(drone=drone, dispatcher=dispatcher, flight_log=timed_log)
+    if getattr(gesture_control, "capture", None) is not None:
+        gesture_control.capture = TimedPoll(gesture_control.capture, timer)
+    else:
+        timed_frame_read(drone, timer)
+    gesture_control.hands = TimedProxy(gesture_control.hands, timer, {"process": "hands.process"})
+    roi_tracker = getattr(gesture_control, "roi_tracker", None)
+    if roi_tracker is not None:
+        roi_tracker.hands = gesture_control.hands
+    gesture_control.drone = TimedProxy(drone, timer, {method: "comando" for method in MOVE_METHODS})
+    mission.cv2 = cv2_proxy(timer, args)
+
+    # Com a thread de captura, ticks sem quadro novo retornam logo e não contam
+    while timer.frames < args.frames and not drone.get_frame_read().stopped:
+        gate = getattr(gesture_control, "frame_gate", None)
+        processed = gate.processed if gate is not None else None
+        start = time.perf_counter()
+        gesture_control.update()
+        elapsed = time.perf_counter() - start
+        if gate is None or gate.processed != processed:
+            timer.add("total", elapsed)
+            timer.frame()
+
+    gesture_control.terminate(None)
+    dispatcher.stop()
+    drone.end()
+    extra = []
+    if flight_log is not None:
+        flight_log.close()
+        flight_log.telemetry.stop()
+        extra.append(flight_log.summary())
+    if roi_tracker is not None:
+        extra.append(roi_tracker.summary())
+    quality = getattr(gesture_control, "quality", None)
+    if quality is not None and args.auto_quality:
+        extra.append(quality.summary())
+    return "\n".join(extra)
+
+
+def compare(results, baseline):
+    lines = ["== comparação com a linha de base (p50 / p95 / FPS)"]
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        lines.append(f"{name}: FPS {old['fps']:.1f} -> {result['fps']:.1f}")
+        for stage, stats in result["stages"].items():
+            if stage not in old["stages"]:
+                continue
+            before = old["stages"][stage]
+            lines.append(f"  {stage:<24} p50 {before['p50']:.2f} -> {stats['p50']:.2f} ms"
+                         f" | p95 {before['p95']:.2f} -> {stats['p95']:.2f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline percepção -> comando")
+    parser.add_argument("--video", required=True, help="vídeo gravado usado como stream do drone")
+    parser.add_argument("--pipeline", choices=list(PIPELINES) + ["all"], default="all")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--stream-fps", type=float, default=30.0,
+                        help="taxa do stream simulado (0 = o mais rápido que a decodificação permitir)")
+    parser.add_argument("--resolution", type=int, default=720)
+    parser.add_argument("--latency", type=float, default=0.05, help="latência das respostas do drone (s)")
+    parser.add_argument("--move-speed", type=float, default=100.0, help="velocidade dos movimentos (cm/s)")
+    parser.add_argument("--workers", type=int, default=0, help="processos de inferência (missao4-v3)")
+    parser.add_argument("--roi", action="store_true", help="rastreia a mão por região de interesse")
+    parser.add_argument("--auto-quality", action="store_true", help="qualidade automática (missao4-v3)")
+    parser.add_argument("--budget", type=int, default=50, help="orçamento de latência da qualidade automática (ms)")
+    parser.add_argument("--rc", action="store_true", help="controle contínuo por velocidades rc")
+    parser.add_argument("--record", action="store_true", help="grava o vídeo bruto e o anotado (missao4-v3)")
+    parser.add_argument("--flight-log", action="store_true", help="registro binário do voo (bench_<pipeline>_<data>.fdr)")
+    parser.add_argument("--headless", action="store_true", help="não abre janelas do OpenCV")
+    parser.add_argument("--json", help="salva os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    # Os scripts leem o modo headless ao criar a DisplaySink
+    if args.headless:
+        os.environ["TELLO_HEADLESS"] = "1"
+
+    names = list(PIPELINES) if args.pipeline == "all" else [args.pipeline]
+    results = {}
+    for name in names:
+        timer = StageTimer()
+        # Os scripts imprimem a cada frame; o custo continua sendo medido
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if name == "tdp":
+                extra = bench_tdp(args, timer)
+            else:
+                extra = bench_mission(name, args, timer)
+        print(timer.report(name))
+        if extra:
+            print(extra)
+        results[name] = {"frames": timer.frames, "fps": timer.fps(), "stages": timer.summary()}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(compare(results, json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""Captura de vídeo em thread dedicada com buffer triplo pré-alocado.
+
+A thread de captura acompanha o ``frame`` do leitor do drone (BackgroundFrameRead
+ou FileFrameRead) e copia cada quadro novo para um dos buffers que ela mesma
+aloca, publicando-o com um número de sequência crescente e o instante da
+captura. O consumidor recebe o buffer publicado e pode desenhar nele à vontade:
+enquanto estiver com ele, a captura escreve nos outros dois.
+"""
+
+import collections
+import threading
+import time
+
+import cv2
+import numpy as np
+
+FramePacket = collections.namedtuple("FramePacket", ["seq", "timestamp", "frame"])
+
+
+class CaptureThread:
+    def __init__(self, frame_read, buffers=3, max_fps=None, poll_interval=0.001):
+        if buffers < 3:
+            raise ValueError("São necessários pelo menos 3 buffers (escrita, publicado e em uso)")
+        self.frame_read = frame_read
+        self.buffers = [None] * buffers
+        self.max_fps = max_fps
+        self.poll_interval = poll_interval
+
+        self.seq = -1
+        self.timestamp = 0.0
+        self.published = None  # índice do buffer com o último quadro
+        self.held = None  # índice do buffer entregue ao consumidor
+        self.captured = 0
+        self.overwritten = 0  # quadros publicados que ninguém leu
+        self.consumed_seq = -1
+
+        self.condition = threading.Condition()
+        self.stopped = True
+        self.worker = None
+
+    def start(self):
+        self.stopped = False
+        self.worker = threading.Thread(target=self.capture_loop, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+        with self.condition:
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join(timeout=1)
+
+    def free_buffer(self):
+        for i in range(len(self.buffers)):
+            if i != self.published and i != self.held:
+                return i
+
+    def capture_loop(self):
+        last = None
+        period = 1.0 / self.max_fps if self.max_fps else 0.0
+        next_time = time.perf_counter()
+
+        while not self.stopped:
+            frame = self.frame_read.frame
+            if frame is None or frame is last:
+                if getattr(self.frame_read, "stopped", False):
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            last = frame
+            timestamp = time.time()
+
+            with self.condition:
+                index = self.free_buffer()
+            buffer = self.buffers[index]
+            if buffer is None or buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+                buffer = self.buffers[index] = np.empty_like(frame)
+            np.copyto(buffer, frame)
+
+            with self.condition:
+                if self.seq > self.consumed_seq:
+                    self.overwritten += 1
+                self.published = index
+                self.seq += 1
+                self.timestamp = timestamp
+                self.captured += 1
+                self.condition.notify_all()
+
+            if period:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.perf_counter()
+
+        self.stopped = True
+        with self.condition:
+            self.condition.notify_all()
+
+    def _take(self):
+        self.held = self.published
+        self.consumed_seq = self.seq
+        return FramePacket(self.seq, self.timestamp, self.buffers[self.published])
+
+    def read(self, last_seq=-1, timeout=None):
+        """Espera um quadro com sequência maior que ``last_seq`` e o entrega.
+        Retorna None se o tempo acabar ou a captura parar."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.seq > last_seq or self.stopped, timeout):
+                return None
+            if self.seq <= last_seq:
+                return None
+            return self._take()
+
+    def poll(self, last_seq=-1):
+        """Versão sem bloqueio: entrega o quadro mais recente se for novo."""
+        with self.condition:
+            if self.seq <= last_seq:
+                return None
+            return self._take()
+
+    def release(self):
+        with self.condition:
+            self.held = None
+
+    @property
+    def frame(self):
+        # Compatível com BackgroundFrameRead.frame
+        packet = self.poll()
+        return None if packet is None else packet.frame
+
+
+class FrameGate:
+    """Evita rodar a inferência de novo sobre o mesmo quadro.
+
+    Com número de sequência (CaptureThread), um quadro é novo quando a sequência
+    muda. Sem ela, o quadro é novo se não for o mesmo array do anterior e se
+    algum pixel da miniatura dele diferir do da última miniatura processada em
+    mais que ``threshold`` níveis. A média da diferença não serve: uma mão
+    pequena se mexendo muda pouco a média do quadro inteiro."""
+
+    def __init__(self, threshold=8, size=(32, 24)):
+        self.threshold = threshold
+        self.size = size
+        self.last_seq = None
+        self.last_frame = None
+        self.last_thumbnail = None
+        self.processed = 0
+        self.skipped = 0
+
+    def is_new(self, frame, seq=None):
+        if seq is not None:
+            new = seq != self.last_seq
+            self.last_seq = seq
+        elif frame is self.last_frame:
+            new = False
+        else:
+            self.last_frame = frame
+            thumbnail = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            new = (self.last_thumbnail is None or thumbnail.shape != self.last_thumbnail.shape
+                   or cv2.norm(thumbnail, self.last_thumbnail, cv2.NORM_INF) > self.threshold)
+            if new:
+                self.last_thumbnail = thumbnail
+
+        if new:
+            self.processed += 1
+        else:
+            self.skipped += 1
+        return new
+
+    def summary(self):
+        total = self.processed + self.skipped
+        rate = 100.0 * self.skipped / total if total else 0.0
+        return f"Quadros processados: {self.processed} | pulados: {self.skipped} ({rate:.1f}%)"
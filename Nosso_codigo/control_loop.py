@@ -0,0 +1,142 @@
+"""Laço de controle da árvore de comportamento em thread própria.
+
+O ControlLoop dá tick na árvore do py_trees numa thread dedicada, com prazos
+fixos: o próximo tick é marcado a partir do prazo anterior, não do fim do
+tick, então o período não acumula o tempo de processamento. Um tick que passa
+do prazo conta como estouro e o laço recomeça do instante atual em vez de
+disparar ticks atrasados em sequência.
+
+A thread de controle nunca toca no Tk. Os comportamentos leem um
+SharedSettings, cópia com valores simples das variáveis da GUI. A GUI manda as
+alterações por ``commands`` e recebe pela fila ``events`` o que os
+comportamentos escrevem, as estatísticas e o fim da missão.
+
+Com um TreeProfiler, o laço também mede o tempo de cada comportamento no tick e
+manda a tabela para a GUI junto com as estatísticas (evento ``profile``).
+"""
+
+import queue
+import threading
+import time
+
+import py_trees
+
+from perf import StageTimer
+
+
+class SharedVar:
+    """Mesma interface (get/set) das variáveis do Tk. O set() avisa a GUI."""
+
+    def __init__(self, name, value, events):
+        self.name = name
+        self.value = value
+        self.events = events
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+        self.events.put(("var", self.name, value))
+
+
+class SharedSettings:
+    def __init__(self, values, events):
+        self.names = list(values)
+        self.events = events
+        for name, value in values.items():
+            setattr(self, name, SharedVar(name, value, events))
+
+
+class ControlLoop:
+    def __init__(self, tree, settings, stats_interval=1.0, profiler=None):
+        self.tree = tree
+        self.settings = settings
+        self.stats_interval = stats_interval
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(tree)
+        self.events = settings.events
+        self.commands = queue.Queue()
+
+        self.timer = StageTimer()
+        self.ticks = 0
+        self.overruns = 0
+        self.stopped = threading.Event()
+        self.worker = None
+
+    def start(self):
+        self.stopped.clear()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        if self.worker is not None and self.worker is not threading.current_thread():
+            self.worker.join(timeout)
+
+    def set(self, name, value):
+        """Chamado pela GUI: atualiza uma variável antes do próximo tick."""
+        self.commands.put((name, value))
+
+    def apply_commands(self):
+        while True:
+            try:
+                name, value = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            getattr(self.settings, name).value = value
+
+    def run(self):
+        next_time = time.perf_counter()
+        last_stats = next_time
+        status = None
+        while not self.stopped.is_set():
+            self.apply_commands()
+
+            start = time.perf_counter()
+            self.timer.add("atraso", start - next_time)
+            try:
+                self.tree.tick()
+            except Exception as e:
+                self.events.put(("error", e))
+                return
+            end = time.perf_counter()
+            self.timer.add("tick", end - start)
+            self.ticks += 1
+
+            status = self.tree.root.status
+            if status in (py_trees.common.Status.SUCCESS, py_trees.common.Status.FAILURE):
+                break
+
+            if end - last_stats >= self.stats_interval:
+                last_stats = end
+                self.events.put(("stats", self.status_line()))
+                if self.profiler is not None:
+                    self.events.put(("profile", "\n".join(self.profiler.table())))
+
+            next_time += self.settings.tick_interval.get()
+            delay = next_time - time.perf_counter()
+            if delay < 0:
+                self.overruns += 1
+                next_time = time.perf_counter()
+            else:
+                self.stopped.wait(delay)
+
+        self.events.put(("done", status))
+
+    def status_line(self):
+        stats = self.timer.summary()
+        lateness = stats.get("atraso", {}).get("p95", 0.0)
+        tick = stats.get("tick", {}).get("p95", 0.0)
+        return f"{self.ticks} ticks | tick p95 {tick:.1f} ms | atraso p95 {lateness:.1f} ms | estouros {self.overruns}"
+
+    def summary(self):
+        lines = [f"Laço de controle: {self.ticks} ticks, {self.overruns} estouros de prazo"]
+        for name, stats in self.timer.summary().items():
+            lines.append(f"  {name:<7} p50 {stats['p50']:.1f} ms  p95 {stats['p95']:.1f} ms  "
+                         f"p99 {stats['p99']:.1f} ms  máx {stats['max']:.1f} ms")
+        if self.profiler is not None:
+            lines.append(self.profiler.summary())
+        return "\n".join(lines)
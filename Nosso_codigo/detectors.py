@@ -0,0 +1,107 @@
+"""Registro de detectores compartilhados.
+
+O Haar cascade, a rede DNN de faces, o MediaPipe Face Detection e o MediaPipe
+Hands são carregados uma única vez (na primeira
+chamada ou no preload() do início do script), aquecidos com um frame vazio e
+a mesma instância é devolvida para todos que pedirem a mesma configuração.
+O Hands guarda estado de rastreamento entre frames, então cada configuração
+deve ser usada por um único stream de vídeo.
+"""
+
+import os
+import threading
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+FACE_CASCADE_PATH = "Resources/haarcascade_frontalface_default.xml"
+
+# Detector de faces SSD ResNet-10 do OpenCV (arquivos em Resources/)
+FACE_NET_MODEL = "Resources/res10_300x300_ssd_iter_140000.caffemodel"
+FACE_NET_CONFIG = "Resources/deploy.prototxt"
+
+_detectors = {}
+_lock = threading.Lock()
+
+
+def _get(key, factory):
+    detector = _detectors.get(key)
+    if detector is None:
+        with _lock:
+            detector = _detectors.get(key)
+            if detector is None:
+                detector = factory()
+                _detectors[key] = detector
+    return detector
+
+
+def _load_face_cascade(path):
+    # Se o arquivo não estiver em Resources/, usa o que vem com o OpenCV
+    if not os.path.exists(path):
+        path = os.path.join(cv2.data.haarcascades, os.path.basename(path))
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        raise Exception(f"Não foi possível carregar o Haar cascade {path}")
+    cascade.detectMultiScale(np.zeros((240, 240), dtype=np.uint8), 1.2, 8)
+    return cascade
+
+
+def _load_face_net(model, config):
+    if not os.path.exists(model) or not os.path.exists(config):
+        raise Exception(f"Modelo DNN de faces não encontrado ({model}, {config})")
+    net = cv2.dnn.readNet(model, config)
+    net.setInput(cv2.dnn.blobFromImage(np.zeros((300, 300, 3), dtype=np.uint8), 1.0, (300, 300),
+                                       (104.0, 177.0, 123.0)))
+    net.forward()
+    return net
+
+
+def _load_face_detection(**options):
+    face_detection = mp.solutions.face_detection.FaceDetection(**options)
+    face_detection.process(np.zeros((256, 256, 3), dtype=np.uint8))
+    return face_detection
+
+
+def _load_hands(**options):
+    hands = mp.solutions.hands.Hands(**options)
+    hands.process(np.zeros((256, 256, 3), dtype=np.uint8))
+    return hands
+
+
+def get_face_cascade(path=FACE_CASCADE_PATH):
+    return _get(("face_cascade", path), lambda: _load_face_cascade(path))
+
+
+def get_face_net(model=FACE_NET_MODEL, config=FACE_NET_CONFIG):
+    return _get(("face_net", model, config), lambda: _load_face_net(model, config))
+
+
+def get_face_detection(model_selection=0, min_detection_confidence=0.5):
+    options = {
+        "model_selection": model_selection,
+        "min_detection_confidence": round(float(min_detection_confidence), 2),
+    }
+    key = ("face_detection",) + tuple(sorted(options.items()))
+    return _get(key, lambda: _load_face_detection(**options))
+
+
+def get_hands(static_image_mode=False, max_num_hands=2, min_detection_confidence=0.5,
+              min_tracking_confidence=0.5):
+    options = {
+        "static_image_mode": static_image_mode,
+        "max_num_hands": max_num_hands,
+        "min_detection_confidence": round(float(min_detection_confidence), 2),
+        "min_tracking_confidence": round(float(min_tracking_confidence), 2),
+    }
+    key = ("hands",) + tuple(sorted(options.items()))
+    return _get(key, lambda: _load_hands(**options))
+
+
+def preload(face=False, hands=None):
+    """Carrega e aquece os detectores antes da decolagem. ``hands`` é um dict
+    com as opções do get_hands, ou None para não carregar o Hands."""
+    if face:
+        get_face_cascade()
+    if hands is not None:
+        get_hands(**hands)
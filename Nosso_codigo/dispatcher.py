@@ -0,0 +1,200 @@
+"""Despachante único dos comandos do drone.
+
+Uma única thread envia os comandos com resposta (``send_command_with_return``),
+um de cada vez, a partir de uma fila limitada:
+
+- movimentos iguais seguidos na fila são somados (três ``up 20`` viram ``up 60``);
+- ``land``/``emergency`` descartam o que estiver na fila e passam na frente;
+- cada comando tem timeout próprio e uma falha não trava os próximos;
+- send() devolve um Future com a resposta, para quem precisa esperar o ack
+  sem bloquear (comportamentos da árvore, por exemplo);
+- a profundidade da fila, a espera na fila e o tempo de ida e volta de cada
+  comando ficam registrados.
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from perf import StageTimer
+
+# Limites do SDK para somar movimentos
+COALESCE_LIMITS = {
+    "up": 500, "down": 500, "left": 500, "right": 500,
+    "forward": 500, "back": 500, "cw": 3600, "ccw": 3600,
+}
+OVERRIDE_COMMANDS = ("land", "emergency")
+COMMAND_TIMEOUTS = {"takeoff": 20, "land": 20}
+
+PendingCommand = collections.namedtuple("PendingCommand", ["command", "delay", "submitted", "future"])
+
+
+def is_ok(command, response):
+    if command.endswith("?"):
+        return not any(word in response for word in ("error", "ERROR", "Aborting"))
+    return response.strip().lower() == "ok"
+
+
+class CommandDispatcher:
+    def __init__(self, drone, maxsize=8, timeout=7, coalesce=True, on_response=None, honour_delays=True):
+        self.drone = drone
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.coalesce = coalesce
+        self.on_response = on_response
+        # False no replay: o drone falso não precisa esperar o ``delay`` dos comandos
+        self.honour_delays = honour_delays
+
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.in_flight = None
+        self.stopped = True
+        self.worker = None
+
+        self.timer = StageTimer()
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.max_depth = 0
+        self.last_response = None
+
+    def start(self):
+        self.stopped = False
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Para depois de enviar o que já está na fila."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join(timeout)
+
+    def submit(self, command, delay=0.0):
+        """Coloca um comando na fila. ``delay`` é uma espera antes de enviá-lo.
+        Retorna False se a fila estiver cheia e o comando for descartado."""
+        return self.send(command, delay) is not None
+
+    def send(self, command, delay=0.0):
+        """Como submit(), mas retorna um Future com a resposta do drone (ou None
+        se o comando foi descartado). Um comando somado a outro compartilha o
+        Future dele; um comando cancelado tem o Future cancelado."""
+        verb = command.split()[0]
+        with self.condition:
+            if verb in OVERRIDE_COMMANDS:
+                # O mesmo pouso já está na fila ou sendo executado
+                if self.queue and self.queue[-1].command == command:
+                    return self.queue[-1].future
+                if not self.queue and self.in_flight is not None and self.in_flight.command == command:
+                    return self.in_flight.future
+                self.cancel_queue()
+            elif self.coalesce and not delay and self.queue and self.merge(command, verb):
+                self.coalesced += 1
+                return self.queue[-1].future
+            elif len(self.queue) >= self.maxsize:
+                self.dropped += 1
+                return None
+
+            future = Future()
+            self.queue.append(PendingCommand(command, delay, time.perf_counter(), future))
+            self.max_depth = max(self.max_depth, len(self.queue))
+            self.condition.notify_all()
+            return future
+
+    def merge(self, command, verb):
+        # Soma com o último comando da fila se for o mesmo movimento
+        if verb not in COALESCE_LIMITS:
+            return False
+        last = self.queue[-1]
+        parts, last_parts = command.split(), last.command.split()
+        if last_parts[0] != verb or last.delay or len(parts) != 2 or len(last_parts) != 2:
+            return False
+        try:
+            total = int(parts[1]) + int(last_parts[1])
+        except ValueError:
+            return False
+        if total > COALESCE_LIMITS[verb]:
+            return False
+        self.queue[-1] = last._replace(command=f"{verb} {total}")
+        return True
+
+    def cancel_queue(self):
+        for item in self.queue:
+            item.future.cancel()
+        self.cancelled += len(self.queue)
+        self.queue.clear()
+
+    def cancel(self):
+        """Descarta os comandos que ainda não foram enviados."""
+        with self.condition:
+            count = len(self.queue)
+            self.cancel_queue()
+            self.condition.notify_all()
+        return count
+
+    @property
+    def depth(self):
+        return len(self.queue)
+
+    @property
+    def idle(self):
+        with self.condition:
+            return not self.queue and self.in_flight is None
+
+    def wait_idle(self, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.queue and self.in_flight is None, timeout)
+
+    def run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.stopped)
+                if not self.queue:
+                    break
+                item = self.queue.popleft()
+                if not item.future.set_running_or_notify_cancel():
+                    # Cancelado por quem recebeu o Future enquanto esperava na fila
+                    self.cancelled += 1
+                    self.condition.notify_all()
+                    continue
+                self.in_flight = item
+
+            if item.delay and self.honour_delays:
+                time.sleep(item.delay)
+
+            verb = item.command.split()[0]
+            timeout = COMMAND_TIMEOUTS.get(verb, self.timeout)
+            start = time.perf_counter()
+            self.timer.add("fila", start - item.submitted)
+            try:
+                response = self.drone.send_command_with_return(item.command, timeout=timeout)
+            except Exception as e:
+                response = f"error {e}"
+            rtt = time.perf_counter() - start
+
+            self.timer.add(verb, rtt)
+            self.sent += 1
+            if not is_ok(item.command, response):
+                self.failed += 1
+            self.last_response = response
+
+            with self.condition:
+                self.in_flight = None
+                self.condition.notify_all()
+            item.future.set_result(response)
+
+            if self.on_response is not None:
+                self.on_response(item.command, response, rtt)
+
+    def summary(self):
+        lines = [f"Comandos: enviados {self.sent}, falhas {self.failed}, somados {self.coalesced}, "
+                 f"descartados {self.dropped}, cancelados {self.cancelled}, fila máxima {self.max_depth}"]
+        for name, stats in self.timer.summary().items():
+            lines.append(f"  {name:<10} n={stats['count']:<5} p50 {stats['p50']:.0f} ms  "
+                         f"p95 {stats['p95']:.0f} ms  máx {stats['max']:.0f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,96 @@
+"""Exibição dos quadros anotados numa thread própria.
+
+O laço de controle só entrega o quadro com show(); a thread de exibição faz o
+``cv2.imshow``/``cv2.waitKey`` numa taxa limitada. show() aceita no máximo um
+quadro por período de exibição e o copia para um buffer da própria
+DisplaySink, porque o quadro original volta para a captura logo depois; os
+outros são descartados sem cópia. Se a thread ainda não mostrou o quadro
+anterior, ele é trocado pelo mais novo.
+
+Com ``TELLO_HEADLESS=1`` (ou ``headless=True``) nada é desenhado nem aberto:
+show() retorna na hora e os scripts pulam os desenhos.
+"""
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def headless_from_env():
+    return os.environ.get("TELLO_HEADLESS", "") not in ("", "0")
+
+
+class DisplaySink:
+    def __init__(self, window, max_fps=30, headless=None):
+        self.window = window
+        self.period = 1.0 / max_fps
+        self.headless = headless_from_env() if headless is None else headless
+
+        self.buffers = [None, None, None]
+        self.pending = None  # índice do buffer esperando para ser exibido
+        self.displaying = None  # índice do buffer no imshow
+        self.last_accept = 0.0
+        self.lock = threading.Lock()
+        self.quit_requested = False
+
+        self.accepted = 0
+        self.dropped = 0
+        self.shown = 0
+        self.stopped = threading.Event()
+        self.worker = None
+
+    def start(self):
+        if not self.headless:
+            self.stopped.clear()
+            self.worker = threading.Thread(target=self.run, daemon=True)
+            self.worker.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.worker is not None:
+            self.worker.join(timeout=1)
+
+    def show(self, frame):
+        if self.headless:
+            return
+        now = time.perf_counter()
+        if now - self.last_accept < self.period:
+            self.dropped += 1
+            return
+        self.last_accept = now
+
+        with self.lock:
+            index = next(i for i in range(len(self.buffers)) if i != self.pending and i != self.displaying)
+            if self.pending is not None:
+                self.dropped += 1
+        buffer = self.buffers[index]
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = self.buffers[index] = np.empty_like(frame)
+        np.copyto(buffer, frame)
+        with self.lock:
+            self.pending = index
+        self.accepted += 1
+
+    def run(self):
+        while not self.stopped.is_set():
+            with self.lock:
+                index, self.pending = self.pending, None
+                self.displaying = index
+            if index is not None:
+                cv2.imshow(self.window, self.buffers[index])
+                self.shown += 1
+                with self.lock:
+                    self.displaying = None
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.quit_requested = True
+            self.stopped.wait(self.period / 2)
+        cv2.destroyWindow(self.window)
+
+    def summary(self):
+        if self.headless:
+            return "Exibição desligada (headless)"
+        return f"Exibição: {self.shown} quadros mostrados, {self.dropped} descartados"
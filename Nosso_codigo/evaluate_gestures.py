@@ -0,0 +1,144 @@
+"""Avaliação dos classificadores de gestos sobre um conjunto rotulado.
+
+O conjunto é um ``.npz`` com dois arrays:
+
+- ``landmarks``: ``float32`` (N, 21, 3), os landmarks de cada mão (como
+  ``gesture_classifier.to_array``);
+- ``labels``: o gesto certo de cada mão, como id (índice de ``GESTURES``) ou
+  como nome ("move_up", "land"...). "none" marca mãos sem gesto.
+
+Cada variante (as regras do TDP_tello.py, as do gestures.py e, com
+``--spread``, outros limiares do polegar) classifica o conjunto inteiro de uma
+vez. O relatório traz a matriz de confusão, a precisão e a revocação por gesto,
+e as classificações por segundo em lote e uma mão por vez (como nos scripts).
+
+    python Nosso_codigo/evaluate_gestures.py maos.npz
+    python Nosso_codigo/evaluate_gestures.py maos.npz --variants tdp --spread 0.15 0.2 0.25
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from gesture_classifier import GESTURE_IDS, GESTURES, GESTURES_RULES, TDP_RULES, GestureClassifier
+
+VARIANTS = {
+    "tdp": TDP_RULES,
+    "gestures": GESTURES_RULES,
+}
+
+
+def load_dataset(path):
+    data = np.load(path)
+    landmarks = np.asarray(data["landmarks"], dtype=np.float32).reshape(-1, 21, 3)
+    labels = data["labels"]
+    if labels.dtype.kind in "US":
+        unknown = sorted(set(labels.astype(str)) - set(GESTURE_IDS))
+        if unknown:
+            raise ValueError(f"Gestos desconhecidos em {path}: {', '.join(unknown)}")
+        labels = np.array([GESTURE_IDS[name] for name in labels.astype(str)])
+    labels = labels.astype(np.int64)
+    if len(labels) != len(landmarks):
+        raise ValueError(f"{path}: {len(landmarks)} mãos e {len(labels)} rótulos")
+    return landmarks, labels
+
+
+def confusion_matrix(labels, predicted, classes=len(GESTURES)):
+    """Linhas: gesto certo; colunas: gesto previsto."""
+    return np.bincount(labels * classes + predicted, minlength=classes * classes).reshape(classes, classes)
+
+
+def precision_recall(matrix):
+    hits = np.diag(matrix).astype(np.float64)
+    predicted = matrix.sum(axis=0)
+    actual = matrix.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, hits / predicted, np.nan)
+        recall = np.where(actual > 0, hits / actual, np.nan)
+    return precision, recall
+
+
+def throughput(classifier, landmarks, repeat=20, single=2000):
+    """Classificações por segundo em lote e uma mão por vez."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        classifier.classify_batch(landmarks)
+    batch = repeat * len(landmarks) / (time.perf_counter() - start)
+
+    hands = landmarks[:single]
+    start = time.perf_counter()
+    for hand in hands:
+        classifier.classify(hand)
+    one_by_one = len(hands) / (time.perf_counter() - start)
+    return batch, one_by_one
+
+
+def evaluate(name, classifier, landmarks, labels, repeat=20):
+    predicted = classifier.classify_batch(landmarks).astype(np.int64)
+    matrix = confusion_matrix(labels, predicted)
+    precision, recall = precision_recall(matrix)
+    batch, one_by_one = throughput(classifier, landmarks, repeat)
+    return {
+        "variant": name,
+        "spread": classifier.spread,
+        "accuracy": float(np.mean(predicted == labels)),
+        "confusion": matrix.tolist(),
+        "precision": {GESTURES[i]: float(p) for i, p in enumerate(precision) if not np.isnan(p)},
+        "recall": {GESTURES[i]: float(r) for i, r in enumerate(recall) if not np.isnan(r)},
+        "batch_per_second": batch,
+        "single_per_second": one_by_one,
+    }
+
+
+def report(result):
+    matrix = np.array(result["confusion"])
+    # Só os gestos que aparecem no conjunto ou nas previsões
+    used = np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1))
+    short = [GESTURES[i][:8] for i in used]
+    lines = [f"== {result['variant']} (spread {result['spread']}): acurácia {100 * result['accuracy']:.1f}%",
+             "certo / previsto".ljust(18) + "".join(f"{name:>9}" for name in short)]
+    for i in used:
+        lines.append(f"{GESTURES[i]:<18}" + "".join(f"{matrix[i, j]:>9}" for j in used))
+
+    lines.append(f"{'gesto':<18}{'precisão':>10}{'revocação':>11}{'amostras':>10}")
+    for i in used:
+        name = GESTURES[i]
+        precision = result["precision"].get(name)
+        recall = result["recall"].get(name)
+        lines.append(f"{name:<18}"
+                     f"{'-' if precision is None else f'{100 * precision:.1f}%':>10}"
+                     f"{'-' if recall is None else f'{100 * recall:.1f}%':>11}"
+                     f"{matrix[i].sum():>10}")
+    lines.append(f"Classificações/s: {result['batch_per_second']:,.0f} em lote, "
+                 f"{result['single_per_second']:,.0f} uma mão por vez")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Acurácia e vazão dos classificadores de gestos")
+    parser.add_argument("dataset", help=".npz com 'landmarks' (N, 21, 3) e 'labels'")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument("--spread", type=float, nargs="+", default=[0.2],
+                        help="limiares do polegar afastado a comparar")
+    parser.add_argument("--repeat", type=int, default=20, help="repetições da medida em lote")
+    parser.add_argument("--json", help="salva os resultados em JSON")
+    args = parser.parse_args()
+
+    landmarks, labels = load_dataset(args.dataset)
+    print(f"{args.dataset}: {len(labels)} mãos")
+    results = []
+    for name in args.variants:
+        for spread in args.spread:
+            result = evaluate(name, GestureClassifier(VARIANTS[name], spread), landmarks, labels, args.repeat)
+            print(report(result))
+            results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
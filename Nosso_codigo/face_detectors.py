@@ -0,0 +1,138 @@
+"""Detectores de faces intercambiáveis.
+
+Todos os backends têm o mesmo detect(frame): recebe o quadro BGR e devolve um
+array ``int32`` (faces, 4) com x, y, largura e altura em pixels, como o
+``detectMultiScale`` do Haar cascade. O backend é escolhido na inicialização
+pelo nome (variável de ambiente ``FACE_BACKEND`` nos scripts):
+
+- ``haar``: Haar cascade do OpenCV (o detector original);
+- ``mediapipe``: MediaPipe Face Detection;
+- ``dnn``: SSD ResNet-10 do módulo dnn do OpenCV, com o modelo em Resources/.
+
+Rode este arquivo com um vídeo gravado para comparar FPS, latência e taxa de
+detecção de cada backend na máquina atual.
+"""
+
+import argparse
+import os
+
+import cv2
+import numpy as np
+
+from detectors import (FACE_CASCADE_PATH, FACE_NET_CONFIG, FACE_NET_MODEL, get_face_cascade,
+                       get_face_detection, get_face_net)
+
+NO_FACES = np.zeros((0, 4), dtype=np.int32)
+
+
+class HaarFaceDetector:
+    def __init__(self, path=FACE_CASCADE_PATH, scale_factor=1.2, min_neighbors=8):
+        self.cascade = get_face_cascade(path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+
+class MediaPipeFaceDetector:
+    def __init__(self, model_selection=0, min_detection_confidence=0.5):
+        self.face_detection = get_face_detection(model_selection, min_detection_confidence)
+
+    def detect(self, frame):
+        results = self.face_detection.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if not results.detections:
+            return NO_FACES
+        h, w = frame.shape[:2]
+        boxes = np.array([(d.location_data.relative_bounding_box.xmin,
+                           d.location_data.relative_bounding_box.ymin,
+                           d.location_data.relative_bounding_box.width,
+                           d.location_data.relative_bounding_box.height)
+                          for d in results.detections], dtype=np.float32)
+        return np.round(boxes * (w, h, w, h)).astype(np.int32)
+
+
+class DnnFaceDetector:
+    def __init__(self, model=FACE_NET_MODEL, config=FACE_NET_CONFIG, confidence=0.5):
+        self.net = get_face_net(model, config)
+        self.confidence = confidence
+
+    def detect(self, frame):
+        h, w = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        # Saída (1, 1, N, 7): [_, classe, confiança, x0, y0, x1, y1] normalizados
+        detections = self.net.forward().reshape(-1, 7)
+        detections = detections[detections[:, 2] >= self.confidence]
+        boxes = np.clip(detections[:, 3:7], 0.0, 1.0) * (w, h, w, h)
+        boxes[:, 2:] -= boxes[:, :2]
+        return np.round(boxes).astype(np.int32)
+
+
+FACE_BACKENDS = {
+    "haar": HaarFaceDetector,
+    "mediapipe": MediaPipeFaceDetector,
+    "dnn": DnnFaceDetector,
+}
+
+
+def create_face_detector(name="haar", **options):
+    if name not in FACE_BACKENDS:
+        raise ValueError(f"Detector de faces desconhecido: {name} (opções: {', '.join(FACE_BACKENDS)})")
+    return FACE_BACKENDS[name](**options)
+
+
+def face_detector_from_env(default="haar"):
+    return create_face_detector(os.environ.get("FACE_BACKEND", default))
+
+
+def benchmark_backend(name, video, frames, size):
+    from perf import StageTimer
+    from tello_sim import FileFrameRead
+
+    detector = create_face_detector(name)
+    frame_read = FileFrameRead(video, loop=False)
+    timer = StageTimer()
+    detected = 0
+    faces = 0
+    while timer.frames < frames:
+        frame = frame_read.read_next()
+        if frame is None:
+            break
+        frame = cv2.resize(frame, (size, size))
+        with timer.stage("detect"):
+            boxes = detector.detect(frame)
+        timer.frame()
+        detected += len(boxes) > 0
+        faces += len(boxes)
+    frame_read.stop()
+
+    stats = timer.summary().get("detect")
+    if stats is None:
+        return f"{name:<10} nenhum quadro lido"
+    rate = 100.0 * detected / timer.frames
+    fps = 1000.0 / stats["mean"] if stats["mean"] else 0.0
+    return (f"{name:<10} {fps:7.1f} {stats['p50']:8.2f} {stats['p95']:8.2f} "
+            f"{rate:9.1f}% {faces / timer.frames:8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os detectores de faces sobre um vídeo gravado")
+    parser.add_argument("--video", required=True)
+    parser.add_argument("--backends", nargs="+", choices=list(FACE_BACKENDS), default=list(FACE_BACKENDS))
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", type=int, default=720, help="lado do quadro quadrado (como no findFace)")
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'FPS':>7} {'p50 ms':>8} {'p95 ms':>8} {'detecção':>10} {'faces/q':>8}")
+    for name in args.backends:
+        try:
+            print(benchmark_backend(name, args.video, args.frames, args.size))
+        except Exception as e:
+            print(f"{name:<10} indisponível: {e}")
+
+
+if __name__ == '__main__':
+    main()
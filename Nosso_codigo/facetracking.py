@@ -1,37 +1,52 @@
 import cv2
-import numpy as np
-from djitellopy import tello
 import time
+from capture import CaptureThread, FrameGate
+from display import DisplaySink
+from face_detectors import face_detector_from_env
+from pid import PID
+from rc_control import RcStreamer
+from tello_sim import create_tello
 
 
-tello = tello.Tello()
+tello = create_tello()
 tello.connect()
 print(tello.get_battery())
 
+# Carrega o detector de faces (FACE_BACKEND=haar|mediapipe|dnn) antes de decolar
+faceDetector = face_detector_from_env()
+
 tello.streamon()
 tello.takeoff()
 tello.send_rc_control(0, 0, 25, 0)
 time.sleep(1)
 
+# Velocidades saem numa taxa fixa; pacotes repetidos não são reenviados
+RC_RATE = 20
+rc = RcStreamer(tello, rate=RC_RATE).start()
+
+# Janela de vídeo numa thread própria; TELLO_HEADLESS=1 desliga janela e desenhos
+display = DisplaySink("Output").start()
+
 w,h = 720, 720
 fbRange = [6200, 6800]
-pid = [0.4, 0.4, 0]
-pError = 0
+
+# Eixos: [yaw, sobe/desce, frente/trás]; I e D por segundo (dt real entre quadros)
+pid = PID(kp=[0.4, 0.3, 0.03], ki=[0.0, 0.0, 0.0], kd=[0.013, 0.01, 0.0], limit=[100, 50, 20])
 
 def findFace(img):
-    faceCascade = cv2.CascadeClassifier("Resources/haarcascade_frontalface_default.xml")
-    imgGray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = faceCascade.detectMultiScale(imgGray, 1.2, 8)
+    faces = faceDetector.detect(img)
 
     myFaceListC = []
     myFaceListArea = []
 
     for(x, y, w, h) in faces:
-        cv2.rectangle(img, (x,y), (x+w, y+h), (0, 0, 255), 2)
+        if not display.headless:
+            cv2.rectangle(img, (x,y), (x+w, y+h), (0, 0, 255), 2)
         cx = x+w//2
         cy = y+h//2
         area = w*h
-        cv2.circle(img, (cx,cy), 5, (0, 255, 0), cv2.FILLED)
+        if not display.headless:
+            cv2.circle(img, (cx,cy), 5, (0, 255, 0), cv2.FILLED)
         myFaceListC.append([cx, cy])
         myFaceListArea.append(area)
 
@@ -41,38 +56,50 @@ def findFace(img):
     else:
         return img, [[0, 0], 0]
 
-def trackFace(info, w, pid, pError):
+def trackFace(info, w, h, timestamp):
 
     area = info[1]
     x,y = info[0]
-    fb = 0
 
-    error = x - w//2
-    speed = pid[0]*error + pid[1]* (error - pError)
-    speed = int(np.clip(speed, -100, 100))
+    # Sem face: para e zera o controlador
+    if x == 0:
+        pid.reset()
+        rc.zero()
+        return
 
+    # Dentro da faixa de área a distância está boa
     if area > fbRange[0] and area < fbRange[1]:
-        fb = 0
-    elif area > fbRange[1]:
-        fb=-20
-    elif area < fbRange[0] and area != 0:
-        fb = 20
-
-    if x == 0:
-        speed = 0
-        error = 0
-
-    tello.send_rc_control(0, fb, 0, speed)
-    return error
-
-while True:
-    img = tello.get_frame_read().frame
-    img = cv2.resize(img, (w,h))
-    img, info = findFace(img)
-    pError = trackFace( info, w, pid, pError)
-    cv2.imshow("Output", img)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        tello.land()
-        break
+        fbError = 0
+    else:
+        fbError = sum(fbRange) / 2 - area
+
+    yaw, upDown, fb = pid.update([x - w//2, h//2 - y, fbError], timestamp)
+    rc.set(0, fb, upDown, yaw)
+
+# Captura em thread própria: cada quadro chega com o instante em que foi capturado
+capture = CaptureThread(tello.get_frame_read()).start()
+frame_gate = FrameGate()
+last_seq = -1
+
+# 'q' na janela ou Ctrl+C (headless) para pousar
+try:
+    while not display.quit_requested:
+        packet = capture.read(last_seq, timeout=0.1)
+        if packet is not None and frame_gate.is_new(packet.frame, packet.seq):
+            last_seq = packet.seq
+            img = cv2.resize(packet.frame, (w,h))
+            img, info = findFace(img)
+            trackFace(info, w, h, packet.timestamp)
+            display.show(img)
+except KeyboardInterrupt:
+    pass
+
+rc.stop()
+tello.land()
+capture.stop()
+display.stop()
+print(frame_gate.summary())
+print(display.summary())
+print(rc.summary())
 
 
@@ -0,0 +1,250 @@
+"""Registrador de voo binário, num arquivo mapeado na memória.
+
+Cada evento vira um registro de tamanho fixo (``RECORD_DTYPE``) escrito direto
+num ``np.memmap``. Não há formatação de texto nem chamada de sistema por
+registro, só a cópia de alguns campos, então dá para deixar ligado em todo voo.
+O arquivo cresce em blocos de ``chunk`` registros e é cortado no tamanho exato
+no close(). O cabeçalho guarda quantos registros são válidos e é atualizado a
+cada registro: se o programa cair no meio do voo, o log continua legível até o
+último evento.
+
+Há três tipos de registro:
+
+- ``FRAME``: um quadro processado (seq da captura, telemetria, landmarks de até
+  ``MAX_HANDS`` mãos, gesto classificado e gesto ativo depois do filtro);
+- ``COMMAND``: a resposta de um comando (comando, resposta e latência do ack);
+- ``RC``: um pacote de velocidade ``rc`` enviado (sem resposta do drone).
+
+Os gestos são ids pequenos; os nomes correspondentes (``labels``) ficam no
+cabeçalho. load_flight_log() abre o log como memmap somente leitura: só as
+páginas acessadas saem do disco. Rode este arquivo com um log para ver o
+resumo do voo.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+
+from telemetry import STATE_FIELDS
+
+MAGIC = b"TELLOFDR"
+VERSION = 1
+MAX_HANDS = 2
+FRAME, COMMAND, RC = 0, 1, 2
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("record_size", "<u4"),
+    ("count", "<u8"),
+    ("labels", "S512"),  # nomes dos ids de gesto, separados por vírgula
+])
+
+TELEMETRY_DTYPE = np.dtype([(name, "<f4") for name in STATE_FIELDS])
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),  # time.time() do evento
+    ("kind", "u1"),
+    ("hands", "u1"),
+    ("gesture", "i1", (MAX_HANDS,)),
+    ("active", "i1", (MAX_HANDS,)),
+    ("seq", "<i8"),  # quadro da captura (nos comandos, o último quadro registrado)
+    ("telemetry", TELEMETRY_DTYPE),  # NaN para campos ainda desconhecidos
+    ("landmarks", "<f4", (MAX_HANDS, 21, 3)),
+    ("command", "S24"),
+    ("response", "S24"),
+    ("latency", "<f4"),  # ida e volta do comando (s)
+])
+
+
+def log_path(prefix):
+    return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.fdr"
+
+
+def telemetry_values(telemetry):
+    return tuple(np.nan if value is None else value for value in telemetry[1:])
+
+
+def text(value):
+    """Campo de texto do registro -> str."""
+    return bytes(value).decode("utf-8", "replace")
+
+
+class FlightLog:
+    def __init__(self, path, labels=(), telemetry=None, chunk=4096):
+        self.path = path
+        self.labels = labels
+        self.telemetry = telemetry
+        self.chunk = chunk
+
+        self.file = None
+        self.header = None
+        self.records = None
+        self.capacity = 0
+        self.count = 0
+        self.last_seq = -1
+        # Os comandos são registrados pela thread do despachante
+        self.lock = threading.Lock()
+
+    def open(self):
+        self.file = open(self.path, "w+b")
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["record_size"] = RECORD_DTYPE.itemsize
+        header["labels"] = ",".join(self.labels).encode()
+        self.file.write(header.tobytes())
+        self.file.flush()
+        self.header = np.memmap(self.file, dtype=HEADER_DTYPE, mode="r+", shape=(1,))
+        self.grow()
+        return self
+
+    def grow(self):
+        if self.records is not None:
+            self.records.flush()
+        self.capacity += self.chunk
+        self.file.truncate(HEADER_DTYPE.itemsize + self.capacity * RECORD_DTYPE.itemsize)
+        self.records = np.memmap(self.file, dtype=RECORD_DTYPE, mode="r+",
+                                 offset=HEADER_DTYPE.itemsize, shape=(self.capacity,))
+
+    def next_record(self, kind):
+        if self.count == self.capacity:
+            self.grow()
+        record = self.records[self.count]
+        record["timestamp"] = time.time()
+        record["kind"] = kind
+        if self.telemetry is not None:
+            record["telemetry"] = telemetry_values(self.telemetry.latest)
+        else:
+            record["telemetry"] = (np.nan,) * len(STATE_FIELDS)
+        return record
+
+    def commit(self):
+        self.count += 1
+        self.header["count"] = self.count
+
+    def log_frame(self, seq, hands=(), gestures=(), active=()):
+        """Registra um quadro: landmarks (21, 3) e ids de gesto de cada mão."""
+        if self.records is None:
+            return
+        with self.lock:
+            record = self.next_record(FRAME)
+            if seq is None:
+                seq = -1
+            record["seq"] = self.last_seq = seq
+            record["hands"] = min(len(hands), MAX_HANDS)
+            for i, landmarks in enumerate(hands[:MAX_HANDS]):
+                record["landmarks"][i] = landmarks
+            for i, gesture in enumerate(gestures[:MAX_HANDS]):
+                record["gesture"][i] = gesture
+            for i, gesture in enumerate(active[:MAX_HANDS]):
+                record["active"][i] = gesture
+            self.commit()
+
+    def log_command(self, command, response, latency):
+        """Registra a resposta de um comando (mesma assinatura do on_response do despachante)."""
+        if self.records is None:
+            return
+        with self.lock:
+            record = self.next_record(COMMAND)
+            record["seq"] = self.last_seq
+            record["command"] = str(command).encode("utf-8")
+            record["response"] = str(response).encode("utf-8")
+            record["latency"] = latency
+            self.commit()
+
+    def log_rc(self, left_right, forward_backward, up_down, yaw):
+        """Registra um pacote rc enviado (mesma assinatura do send_rc_control)."""
+        if self.records is None:
+            return
+        with self.lock:
+            record = self.next_record(RC)
+            record["seq"] = self.last_seq
+            record["command"] = f"rc {left_right} {forward_backward} {up_down} {yaw}".encode()
+            self.commit()
+
+    def close(self):
+        if self.records is None:
+            return
+        with self.lock:
+            self.records.flush()
+            self.header.flush()
+            self.records = self.header = None
+            self.file.truncate(HEADER_DTYPE.itemsize + self.count * RECORD_DTYPE.itemsize)
+            self.file.close()
+
+    def summary(self):
+        size = (HEADER_DTYPE.itemsize + self.count * RECORD_DTYPE.itemsize) / 1e6
+        return f"Registro de voo {self.path}: {self.count} registros ({size:.1f} MB)"
+
+
+def load_flight_log(path):
+    """Abre um log sem carregá-lo: retorna (labels, registros como memmap somente leitura)."""
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        raise ValueError(f"{path} não é um registro de voo")
+    if header["version"][0] != VERSION or header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: versão {header['version'][0]} do registro de voo não suportada")
+
+    labels = tuple(text(header["labels"][0]).split(",")) if header["labels"][0] else ()
+    capacity = (os.path.getsize(path) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    count = min(int(header["count"][0]), capacity)
+    if count == 0:
+        return labels, np.zeros(0, dtype=RECORD_DTYPE)
+    return labels, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+
+def describe(labels, records):
+    """Resumo de um voo registrado."""
+    if len(records) == 0:
+        return "Registro vazio"
+    # Só os campos usados saem do disco; os landmarks não são lidos
+    kinds = records["kind"]
+    is_frame = kinds == FRAME
+    frames = np.count_nonzero(is_frame)
+    commands = np.flatnonzero(kinds == COMMAND)
+    rc = np.count_nonzero(kinds == RC)
+    start = records["timestamp"][0]
+    duration = records["timestamp"][-1] - start
+    lines = [f"Duração {duration:.1f} s, {frames} quadros, {len(commands)} comandos, {rc} pacotes rc"]
+
+    if frames:
+        with_hands = np.count_nonzero(records["hands"][is_frame])
+        lines.append(f"Quadros com mão: {with_hands} ({100.0 * with_hands / frames:.1f}%)")
+        battery = records["telemetry"]["battery"][is_frame]
+        known = battery[~np.isnan(battery)]
+        if len(known):
+            lines.append(f"Bateria: {known[0]:.0f}% -> {known[-1]:.0f}%")
+        # Ativações: quadros em que o gesto ativo da primeira mão muda para um gesto;
+        # o 0 na frente conta o gesto que já está ativo no primeiro quadro
+        active = np.concatenate(([0], records["active"][is_frame, 0]))
+        changes = active[np.flatnonzero((active[1:] != active[:-1]) & (active[1:] != 0)) + 1]
+        ids, counts = np.unique(changes, return_counts=True)
+        for gesture, count in zip(ids, counts):
+            name = labels[gesture] if gesture < len(labels) else str(gesture)
+            lines.append(f"  gesto {name:<18} {count} ativações")
+
+    if len(commands):
+        latency = records["latency"][commands] * 1000.0
+        p50, p95 = np.percentile(latency, [50, 95])
+        lines.append(f"Latência do ack: p50 {p50:.0f} ms, p95 {p95:.0f} ms, máx {latency.max():.0f} ms")
+        for i in commands:
+            record = records[i]
+            lines.append(f"  {record['timestamp'] - start:8.2f} s  "
+                         f"{text(record['command']):<14} {text(record['response']):<14} "
+                         f"{1000.0 * record['latency']:.0f} ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumo de um registro de voo (.fdr)")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    print(describe(*load_flight_log(args.path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Classificador de gestos vetorizado sobre arrays de landmarks.
+
+Os 21 landmarks da mão viram um array ``float32`` (21, 3) uma única vez. Em
+poucas operações do NumPy sai um código de 5 bits por mão:
+
+- bits 0-3: indicador, médio, anelar e mindinho levantados (ponta acima da
+  ponta do polegar, como nas regras originais);
+- bit 4: polegar afastado do indicador no eixo x.
+
+O código indexa uma tabela de 32 posições com o id do gesto. A tabela é montada
+a partir de uma lista ordenada de regras (a primeira que casa vence), então
+cada cadeia de ``if`` dos scripts vira uma lista de regras com o mesmo
+resultado, e dá para ver quais gestos ficaram inalcançáveis pela ordem.
+"""
+
+import numpy as np
+
+THUMB_TIP = 4
+FINGER_TIPS = [8, 12, 16, 20]  # indicador, médio, anelar, mindinho
+FINGER_WEIGHTS = np.array([1, 2, 4, 8], dtype=np.uint8)
+SPREAD_BIT = 16
+
+INDEX, MIDDLE, RING, PINKY = 1, 2, 4, 8
+
+GESTURES = ("none", "move_up", "move_down", "rotate_left", "rotate_right", "land",
+            "move_forward", "move_backward", "land and takeoff", "takeoff")
+GESTURE_IDS = {name: i for i, name in enumerate(GESTURES)}
+
+
+def fingers(*names):
+    mask = sum(names)
+    return lambda up, spread: up == mask
+
+
+# Mesma ordem do detect_gesture do TDP_tello.py
+TDP_RULES = [
+    ("move_up", fingers(INDEX)),
+    ("move_down", fingers(INDEX, MIDDLE)),
+    ("rotate_left", fingers(INDEX, MIDDLE, RING)),
+    ("rotate_right", fingers(INDEX, MIDDLE, RING, PINKY)),
+    ("land", fingers()),
+    ("move_forward", fingers(INDEX, PINKY)),
+    ("move_backward", lambda up, spread: spread),
+    ("land and takeoff", fingers(PINKY)),
+]
+
+# Mesma ordem do detect_gesture do gestures.py ("takeoff" encobre "land")
+GESTURES_RULES = [
+    ("takeoff", fingers()),
+    ("move_up", fingers(INDEX)),
+    ("move_down", fingers(INDEX, MIDDLE)),
+    ("rotate_left", fingers(INDEX, MIDDLE, RING)),
+    ("rotate_right", fingers(INDEX, MIDDLE, RING, PINKY)),
+    ("land", fingers()),
+]
+
+
+def build_table(rules):
+    table = np.zeros(32, dtype=np.int8)
+    for code in range(32):
+        up, spread = code & 15, bool(code & SPREAD_BIT)
+        for name, rule in rules:
+            if rule(up, spread):
+                table[code] = GESTURE_IDS[name]
+                break
+    return table
+
+
+def unreachable(rules):
+    """Gestos das regras que nunca saem da tabela."""
+    reachable = {GESTURES[i] for i in build_table(rules)}
+    return [name for name, _ in rules if name not in reachable]
+
+
+def to_array(landmarks):
+    """Landmarks do MediaPipe (ou array) -> array float32 (21, 3)."""
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float32, copy=False).reshape(21, 3)
+    return np.array([(p.x, p.y, p.z) for p in landmarks], dtype=np.float32)
+
+
+class GestureClassifier:
+    def __init__(self, rules=TDP_RULES, spread=0.2):
+        self.table = build_table(rules)
+        self.spread = spread
+
+    def codes(self, hands):
+        """Código de 5 bits para um lote de mãos (N, 21, 3)."""
+        hands = np.asarray(hands, dtype=np.float32)
+        thumb = hands[:, THUMB_TIP]
+        tips = hands[:, FINGER_TIPS]
+        up = (tips[:, :, 1] < thumb[:, None, 1]) @ FINGER_WEIGHTS
+        spread = np.abs(thumb[:, 0] - hands[:, FINGER_TIPS[0], 0]) > self.spread
+        return up.astype(np.uint8) | (spread.astype(np.uint8) * SPREAD_BIT)
+
+    def classify_batch(self, hands):
+        """Ids dos gestos (índices de GESTURES) para N mãos de uma vez."""
+        return self.table[self.codes(hands)]
+
+    def classify(self, landmarks):
+        """Nome do gesto de uma mão, ou None."""
+        if landmarks is None or len(landmarks) == 0:
+            return None
+        gesture = self.table[self.codes(to_array(landmarks)[None])[0]]
+        return GESTURES[gesture] if gesture else None
@@ -0,0 +1,114 @@
+"""Filtro temporal dos gestos (votação N de M com histerese).
+
+Cada mão tem um buffer circular pré-alocado com os ids dos últimos ``window``
+gestos e as confianças deles. Um gesto só fica ativo quando aparece em pelo
+menos ``votes`` desses quadros, e só deixa de estar ativo quando cai abaixo de
+``release`` votos. Um quadro ruidoso isolado nunca vira comando, e um quadro
+perdido no meio de um gesto firme não o interrompe.
+
+Os ids são inteiros pequenos, com 0 para "nenhum gesto" (como em
+``gesture_classifier.GESTURES``).
+
+A confiança de cada voto é a que os scripts têm por mão: o score de
+handedness do MediaPipe (quão certo ele está do lado da mão), via hand_keys().
+O Hands não expõe um score de presença da mão nem do gesto; o de handedness cai
+junto quando a detecção é ruim (mão cortada, borrada, de lado), e é só isso que
+``min_confidence`` filtra. Não mede se o gesto foi bem classificado.
+"""
+
+import numpy as np
+
+
+class GestureFilter:
+    def __init__(self, window=5, votes=3, release=None, min_confidence=0.5):
+        if not 1 <= votes <= window:
+            raise ValueError("votes precisa estar entre 1 e window")
+        self.window = window
+        self.votes = votes
+        self.release = release if release is not None else max(1, votes - 1)
+        self.min_confidence = min_confidence
+
+        self.ids = np.zeros(window, dtype=np.int16)
+        self.confidences = np.zeros(window, dtype=np.float32)
+        self.position = 0
+        self.active = 0
+
+        self.frames = 0
+        self.activations = 0
+        self.suppressed = 0  # quadros com gesto que não viraram o gesto ativo
+
+    def reset(self):
+        self.ids[:] = 0
+        self.confidences[:] = 0.0
+        self.active = 0
+
+    def update(self, gesture, confidence=1.0):
+        """Registra o gesto do quadro e retorna o gesto ativo (0 se nenhum)."""
+        if confidence < self.min_confidence:
+            gesture = 0
+        self.ids[self.position] = gesture
+        self.confidences[self.position] = confidence
+        self.position = (self.position + 1) % self.window
+        self.frames += 1
+
+        counts = np.bincount(self.ids)
+        if not (self.active and self.active < len(counts) and counts[self.active] >= self.release):
+            counts[0] = 0
+            best = int(counts.argmax())
+            active = best if counts[best] >= self.votes else 0
+            if active and active != self.active:
+                self.activations += 1
+            self.active = active
+
+        if gesture and gesture != self.active:
+            self.suppressed += 1
+        return self.active
+
+    @property
+    def confidence(self):
+        """Confiança média dos votos do gesto ativo."""
+        if not self.active:
+            return 0.0
+        return float(self.confidences[self.ids == self.active].mean())
+
+
+class HandFilters:
+    """Um GestureFilter por mão, identificada pela chave (lado ou índice)."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.filters = {}
+
+    def update(self, observations):
+        """``observations``: {mão: (id do gesto, score de handedness)} do quadro atual.
+        Mãos que sumiram recebem "nenhum gesto". Retorna {mão: gesto ativo}."""
+        for key in observations:
+            if key not in self.filters:
+                self.filters[key] = GestureFilter(**self.options)
+        active = {}
+        for key, gesture_filter in self.filters.items():
+            gesture, confidence = observations.get(key, (0, 1.0))
+            active[key] = gesture_filter.update(gesture, confidence)
+        return active
+
+    def summary(self):
+        frames = sum(f.frames for f in self.filters.values())
+        activations = sum(f.activations for f in self.filters.values())
+        suppressed = sum(f.suppressed for f in self.filters.values())
+        return (f"Filtro de gestos: {frames} quadros, {activations} ativações, "
+                f"{suppressed} quadros ruidosos ignorados")
+
+
+def hand_keys(results):
+    """Chave e confiança de cada mão do retorno do MediaPipe: o lado da mão e o
+    score de handedness, ou o índice e 1.0 quando não há handedness."""
+    hands = results.multi_hand_landmarks or []
+    handedness = getattr(results, "multi_handedness", None) or []
+    keys = []
+    for i in range(len(hands)):
+        if i < len(handedness):
+            classification = handedness[i].classification[0]
+            keys.append((classification.label, classification.score))
+        else:
+            keys.append((i, 1.0))
+    return keys
@@ -1,74 +1,71 @@
 import cv2
-import numpy as np
-from djitellopy import Tello
 import time
 import mediapipe as mp
 import tkinter as tk
-
-tello = Tello()
+from capture import FrameGate
+from detectors import get_hands, preload
+from display import DisplaySink
+from face_detectors import face_detector_from_env
+from pid import PID
+from gesture_classifier import GestureClassifier, GESTURES_RULES
+from telemetry import TelemetryCache
+from tello_sim import create_tello
+
+tello = create_tello()
 tello.connect()
 print(tello.get_battery())
 
+# Altura e bateria vêm do stream de estado, sem consultar o drone antes de cada movimento
+telemetry = TelemetryCache(tello).start()
+
+# Carrega os detectores antes de decolar (faces: FACE_BACKEND=haar|mediapipe|dnn)
+preload(hands={})
+face_detector = face_detector_from_env()
+
 tello.streamon()
 tello.takeoff()
 tello.send_rc_control(0, 0, 5, 0)
 time.sleep(1)
 
+# Janela de vídeo numa thread própria; TELLO_HEADLESS=1 desliga janela e desenhos
+display = DisplaySink("Output").start()
+
 w, h = 720, 720
 fbRange = [6200, 6800]
-pid = [0.4, 0.4, 0]
-pError = 0
+
+# Eixos: [yaw, sobe/desce, frente/trás]; I e D por segundo (dt real entre quadros)
+pid = PID(kp=[0.4, 0.3, 0.03], ki=[0.0, 0.0, 0.0], kd=[0.013, 0.01, 0.0], limit=[100, 50, 20])
 
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands()
+hands = get_hands()
 mp_drawing = mp.solutions.drawing_utils
 
-# Criar janela de status
-root = tk.Tk()
-root.title("Status do Drone")
-status_label = tk.Label(root, text="Status: ", font=("Helvetica", 16))
-status_label.pack(pady=20)
+# Criar janela de status (sem janela no modo headless: o status só vai para o terminal)
+root = None
+if not display.headless:
+    root = tk.Tk()
+    root.title("Status do Drone")
+    status_label = tk.Label(root, text="Status: ", font=("Helvetica", 16))
+    status_label.pack(pady=20)
 
 def update_status(message):
+    if root is None:
+        print(f"Status: {message}")
+        return
     status_label.config(text=f"Status: {message}")
     root.update()
 
+# Classificador por tabela: mesma ordem das regras de antes, sem percorrer os landmarks um a um
+classifier = GestureClassifier(GESTURES_RULES)
+
 def detect_gesture(landmarks):
-    if landmarks:
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-
-        # Detecta o gesto de decolagem (todos os dedos levantados)
-        if thumb_tip.y < index_tip.y and thumb_tip.y < middle_tip.y and thumb_tip.y < ring_tip.y and thumb_tip.y < pinky_tip.y:
-            return "takeoff"
-        
-        # Detecta o gesto de subir 5 cm (indicador levantado)
-        if index_tip.y < thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "move_up"
-        
-        # Detecta o gesto de descer 5 cm (indicador e médio levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "move_down"
-        
-        # Detecta o gesto para girar para a esquerda (indicador, médio e anelar levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y < thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "rotate_left"
-        
-        # Detecta o gesto para girar para a direita (indicador, médio, anelar e mindinho levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y < thumb_tip.y and pinky_tip.y < thumb_tip.y:
-            return "rotate_right"
-        
-        # Detecta o gesto de pouso (todos os dedos abaixados)
-        if index_tip.y > thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "land"
-    
-    return None
+    return classifier.classify(landmarks)
 
 def move_up():
-    height = tello.get_height()
+    height = telemetry.latest.height
+    if height is None:
+        print("Altura desconhecida, sem telemetria do drone")
+        return
     print(f"Current height: {height} cm")
     if height < 1000:  # assumindo que a altura máxima é 1000 cm (10 metros)
         print("Subir 5 cm")
@@ -77,7 +74,10 @@ def move_up():
         print("Altura máxima atingida")
 
 def move_down():
-    height = tello.get_height()
+    height = telemetry.latest.height
+    if height is None:
+        print("Altura desconhecida, sem telemetria do drone")
+        return
     print(f"Current height: {height} cm")
     if height > 5:  # garantindo que está acima do solo
         print("Descer 5 cm")
@@ -98,19 +98,19 @@ def land():
     tello.land()
 
 def findFace(img):
-    faceCascade = cv2.CascadeClassifier("Resources/haarcascade_frontalface_default.xml")
-    imgGray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = faceCascade.detectMultiScale(imgGray, 1.2, 8)
+    faces = face_detector.detect(img)
 
     myFaceListC = []
     myFaceListArea = []
 
     for (x, y, w, h) in faces:
-        cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 255), 2)
+        if not display.headless:
+            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 255), 2)
         cx = x + w // 2
         cy = y + h // 2
         area = w * h
-        cv2.circle(img, (cx, cy), 5, (0, 255, 0), cv2.FILLED)
+        if not display.headless:
+            cv2.circle(img, (cx, cy), 5, (0, 255, 0), cv2.FILLED)
         myFaceListC.append([cx, cy])
         myFaceListArea.append(area)
 
@@ -120,63 +120,72 @@ def findFace(img):
     else:
         return img, [[0, 0], 0]
 
-def trackFace(info, w, pid, pError):
+def trackFace(info, w, h, timestamp):
     area = info[1]
     x, y = info[0]
-    fb = 0
 
-    error = x - w // 2
-    speed = pid[0] * error + pid[1] * (error - pError)
-    speed = int(np.clip(speed, -100, 100))
+    # Sem face: para e zera o controlador
+    if x == 0:
+        pid.reset()
+        tello.send_rc_control(0, 0, 0, 0)
+        return
 
+    # Dentro da faixa de área a distância está boa
     if area > fbRange[0] and area < fbRange[1]:
-        fb = 0
-    elif area > fbRange[1]:
-        fb = -20
-    elif area < fbRange[0] and area != 0:
-        fb = 20
+        fb_error = 0
+    else:
+        fb_error = sum(fbRange) / 2 - area
 
-    if x == 0:
-        speed = 0
-        error = 0
+    yaw, up_down, fb = pid.update([x - w // 2, h // 2 - y, fb_error], timestamp)
+    tello.send_rc_control(0, int(fb), int(up_down), int(yaw))
 
-    tello.send_rc_control(0, fb, 0, speed)
-    return error
+# Só roda os detectores quando chega um quadro novo do drone
+frame_gate = FrameGate()
 
 while True:
     img = tello.get_frame_read().frame
-    img = cv2.resize(img, (w, h))
-    img, info = findFace(img)
-    #pError = trackFace(info, w, pid, pError)
-    
-    # Processamento de gestos
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    results = hands.process(img_rgb)
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            mp_drawing.draw_landmarks(img, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            gesture = detect_gesture(hand_landmarks.landmark)
-            if gesture == "move_up":
-                update_status("Subindo....") #um dedo
-                # move_up()
-            elif gesture == "move_down":
-                update_status("Descendo....") # dois dedos
-                # move_down()
-            elif gesture == "rotate_left":
-                update_status("Esquerda....") #tres dedos
-                # rotate_left()
-            elif gesture == "rotate_right":
-                update_status("Direita....")#todos os dedos
-                # rotate_right()
-            elif gesture == "land":
-                update_status("Pousando....")#nenhum dedo
-                #land()
-    
-    cv2.imshow("Output", img)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if frame_gate.is_new(img):
+        frame_time = time.time()
+        img = cv2.resize(img, (w, h))
+        img, info = findFace(img)
+        #trackFace(info, w, h, frame_time)
+
+        # Processamento de gestos
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        results = hands.process(img_rgb)
+        if results.multi_hand_landmarks:
+            for hand_landmarks in results.multi_hand_landmarks:
+                if not display.headless:
+                    mp_drawing.draw_landmarks(img, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+                gesture = detect_gesture(hand_landmarks.landmark)
+                if gesture == "move_up":
+                    update_status("Subindo....") #um dedo
+                    # move_up()
+                elif gesture == "move_down":
+                    update_status("Descendo....") # dois dedos
+                    # move_down()
+                elif gesture == "rotate_left":
+                    update_status("Esquerda....") #tres dedos
+                    # rotate_left()
+                elif gesture == "rotate_right":
+                    update_status("Direita....")#todos os dedos
+                    # rotate_right()
+                elif gesture == "land":
+                    update_status("Pousando....")#nenhum dedo
+                    #land()
+
+        display.show(img)
+    else:
+        time.sleep(0.001)
+    if display.quit_requested:
         tello.land()
         break
 
+display.stop()
+print(frame_gate.summary())
+print(display.summary())
+
 # Executar a janela de status do Tkinter
-root.mainloop()
+if root is not None:
+    root.mainloop()
 
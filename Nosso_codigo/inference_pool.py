@@ -0,0 +1,233 @@
+"""Inferência em processos separados com os quadros em memória compartilhada.
+
+O processo principal copia cada quadro para um slot livre de um bloco de
+``multiprocessing.shared_memory`` e manda só (seq, slot, formato) para a fila de
+tarefas. Cada worker roda o seu próprio MediaPipe Hands (ou Haar cascade) sobre
+o slot e devolve arrays compactos: landmarks em ``float32`` com formato
+(mãos, 21, 3) ou caixas de faces em ``int32`` (faces, 4). Assim captura,
+inferência e controle rodam em paralelo e a vazão cresce com os núcleos.
+
+O slot só volta a ficar livre quando o resultado é liberado com release(),
+então o quadro do resultado pode ser desenhado e exibido sem cópia.
+
+Os workers são criados com ``spawn``: o script que usa o pool precisa proteger o
+código principal com ``if __name__ == '__main__'``.
+"""
+
+import multiprocessing as mp_processing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+DEFAULT_FRAME_SHAPE = (720, 1280, 3)
+
+
+class HandsResults:
+    """Imita o retorno do hands.process() para o código que já existe."""
+
+    def __init__(self, multi_hand_landmarks, multi_handedness=None):
+        self.multi_hand_landmarks = multi_hand_landmarks or None
+        self.multi_handedness = multi_handedness or None
+
+
+def landmarks_to_mediapipe(landmarks):
+    """Converte um array (21, 3) de volta para NormalizedLandmarkList."""
+    from mediapipe.framework.formats import landmark_pb2
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in landmarks:
+        landmark_list.landmark.add(x=float(x), y=float(y), z=float(z))
+    return landmark_list
+
+
+def handedness_to_mediapipe(label, score):
+    from mediapipe.framework.formats import classification_pb2
+
+    classification_list = classification_pb2.ClassificationList()
+    classification_list.classification.add(label=label, score=float(score))
+    return classification_list
+
+
+def hands_to_arrays(results):
+    """Extrai landmarks (mãos, 21, 3), scores e lados do retorno do MediaPipe."""
+    hands = results.multi_hand_landmarks or []
+    landmarks = np.array([[(p.x, p.y, p.z) for p in hand.landmark] for hand in hands],
+                         dtype=np.float32).reshape(-1, 21, 3)
+    handedness = results.multi_handedness or []
+    scores = np.array([h.classification[0].score for h in handedness], dtype=np.float32)
+    labels = [h.classification[0].label for h in handedness]
+    return landmarks, scores, labels
+
+
+class InferenceResult:
+    def __init__(self, seq, slot, frame, payload, elapsed):
+        self.seq = seq
+        self.slot = slot
+        self.frame = frame
+        self.elapsed = elapsed
+        self.landmarks = None
+        self.scores = None
+        self.labels = None
+        self.faces = None
+        if isinstance(payload, tuple):
+            self.landmarks, self.scores, self.labels = payload
+        else:
+            self.faces = payload
+
+    def to_mediapipe(self):
+        handedness = [handedness_to_mediapipe(label, score) for label, score in zip(self.labels, self.scores)]
+        return HandsResults([landmarks_to_mediapipe(hand) for hand in self.landmarks], handedness)
+
+
+def _worker(shm_name, kind, options, tasks, results, ready):
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    from detectors import get_face_cascade, get_hands
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    detector = get_hands(**options) if kind == "hands" else get_face_cascade(**options)
+    ready.release()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot, offset, shape = task
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+
+        start = time.perf_counter()
+        if kind == "hands":
+            payload = hands_to_arrays(detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            payload = np.asarray(detector.detectMultiScale(gray, 1.2, 8), dtype=np.int32).reshape(-1, 4)
+        elapsed = time.perf_counter() - start
+
+        # A view precisa sumir antes de fechar a memória compartilhada
+        del frame
+        results.put((seq, slot, payload, elapsed))
+
+    shm.close()
+
+
+class InferencePool:
+    def __init__(self, workers=2, kind="hands", options=None, slots=None,
+                 frame_shape=DEFAULT_FRAME_SHAPE):
+        if kind not in ("hands", "face"):
+            raise ValueError(f"Tipo de detector desconhecido: {kind}")
+        self.workers = workers
+        self.kind = kind
+        self.options = options or {}
+        self.slot_count = slots or workers + 2
+        self.slot_bytes = int(np.prod(frame_shape))
+
+        self.shm = None
+        self.views = None
+        self.slot_shapes = [None] * self.slot_count
+        self.free_slots = []
+        self.processes = []
+        self.context = mp_processing.get_context("spawn")
+        self.tasks = self.context.Queue()
+        self.results = self.context.Queue()
+        self.ready = self.context.Semaphore(0)
+
+        self.last_delivered = -1
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.stale = 0
+        self.worker_time = 0.0
+
+    def start(self, timeout=60):
+        """Sobe os workers e espera todos carregarem o detector."""
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slot_count)
+        self.views = [np.ndarray((self.slot_bytes,), dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=i * self.slot_bytes) for i in range(self.slot_count)]
+        self.free_slots = list(range(self.slot_count))
+        for _ in range(self.workers):
+            process = self.context.Process(
+                target=_worker, args=(self.shm.name, self.kind, self.options, self.tasks, self.results, self.ready),
+                daemon=True)
+            process.start()
+            self.processes.append(process)
+        for _ in self.processes:
+            if not self.ready.acquire(timeout=timeout):
+                self.close()
+                raise Exception("Os processos de inferência não iniciaram a tempo")
+        return self
+
+    def submit(self, frame, seq):
+        """Copia o quadro para um slot livre e o envia aos workers. Retorna False
+        (quadro descartado) se todos os slots estiverem ocupados."""
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Quadro {frame.shape} não cabe nos slots do pool")
+        if not self.free_slots:
+            self.dropped += 1
+            return False
+
+        slot = self.free_slots.pop()
+        view = self.views[slot][:frame.nbytes].reshape(frame.shape)
+        np.copyto(view, frame)
+        self.slot_shapes[slot] = frame.shape
+        self.tasks.put((seq, slot, slot * self.slot_bytes, frame.shape))
+        self.submitted += 1
+        return True
+
+    def get(self, timeout=None):
+        """Próximo resultado mais novo que o último entregue, ou None. Resultados
+        que chegam fora de ordem e já estão velhos são descartados."""
+        while True:
+            try:
+                if timeout == 0:
+                    seq, slot, payload, elapsed = self.results.get_nowait()
+                else:
+                    seq, slot, payload, elapsed = self.results.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+            self.completed += 1
+            self.worker_time += elapsed
+            if seq < self.last_delivered:
+                self.stale += 1
+                self.free_slots.append(slot)
+                continue
+
+            self.last_delivered = seq
+            shape = self.slot_shapes[slot]
+            frame = self.views[slot][:int(np.prod(shape))].reshape(shape)
+            return InferenceResult(seq, slot, frame, payload, elapsed)
+
+    def release(self, result):
+        self.free_slots.append(result.slot)
+
+    @property
+    def busy(self):
+        return self.slot_count - len(self.free_slots)
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+        if self.shm is not None:
+            self.views = None
+            try:
+                self.shm.close()
+            except BufferError:
+                # Ainda há resultados com views abertas; o unlink basta
+                pass
+            self.shm.unlink()
+            self.shm = None
+
+    def summary(self):
+        mean = 1000.0 * self.worker_time / self.completed if self.completed else 0.0
+        return (f"Inferência ({self.workers} processos): enviados {self.submitted}, "
+                f"concluídos {self.completed}, descartados {self.dropped}, "
+                f"fora de ordem {self.stale}, média no worker {mean:.1f} ms")
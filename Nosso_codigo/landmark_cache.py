@@ -0,0 +1,169 @@
+"""Cache em disco dos landmarks do MediaPipe, para rodar de novo os mesmos vídeos.
+
+Ao ajustar as regras de gestos sobre os mesmos vídeos gravados, quase todo o
+tempo vai no ``hands.process``. O LandmarkCache guarda, num SQLite, o resultado
+de cada chamada: landmarks ``float32`` (mãos, 21, 3), scores e lados das mãos.
+O CachedHands tem o mesmo process() do Hands e consulta o cache antes do
+MediaPipe.
+
+A chave de cada chamada vem de uma de duas formas:
+
+- no replay, do vídeo e do índice do quadro (``frame_key``), mais a ordem da
+  chamada dentro do quadro e o formato da imagem (o RoiTracker pode chamar duas
+  vezes por quadro, no recorte e no quadro inteiro). Não custa nada;
+- sem ``frame_key``, do hash do conteúdo da imagem (uns 2 ms num quadro 720p).
+
+O ``namespace`` separa configurações diferentes do detector (versão do
+MediaPipe, confiança mínima...), que dariam landmarks diferentes.
+
+O tamanho do arquivo é limitado (``max_bytes``): quando passa do limite, as
+entradas usadas há mais tempo são removidas (LRU). Cada leitura e escrita
+atualiza um contador de uso, e as alterações são gravadas em lotes.
+"""
+
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+from inference_pool import HandsResults, handedness_to_mediapipe, hands_to_arrays, landmarks_to_mediapipe
+
+# Bytes por entrada além dos blobs (chave, índices e páginas do SQLite), para a conta do tamanho
+ENTRY_OVERHEAD = 64
+
+
+def clip_id(path, sample=1 << 20):
+    """Identifica um vídeo pelo tamanho e pelo conteúdo do início e do fim,
+    sem ler o arquivo todo; não muda se o arquivo for copiado ou renomeado."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            digest.update(f.read(sample))
+    return digest.hexdigest()[:32]
+
+
+class LandmarkCache:
+    def __init__(self, path, max_bytes=1 << 30, commit_every=500):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.commit_every = commit_every
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS landmarks (key BLOB PRIMARY KEY, landmarks BLOB, "
+                        "scores BLOB, labels TEXT, size INTEGER, used INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS landmarks_used ON landmarks (used)")
+        self.entries, self.clock, self.total = self.db.execute(
+            "SELECT COUNT(*), COALESCE(MAX(used), 0), COALESCE(SUM(size), 0) FROM landmarks").fetchone()
+
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def tick(self):
+        self.clock += 1
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.flush()
+        return self.clock
+
+    def get(self, key):
+        """(landmarks, scores, labels) guardados para a chave, ou None."""
+        row = self.db.execute("SELECT landmarks, scores, labels FROM landmarks WHERE key = ?",
+                              (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.db.execute("UPDATE landmarks SET used = ? WHERE key = ?", (self.tick(), key))
+        landmarks = np.frombuffer(row[0], dtype=np.float32).reshape(-1, 21, 3)
+        scores = np.frombuffer(row[1], dtype=np.float32)
+        return landmarks, scores, row[2].split(",") if row[2] else []
+
+    def put(self, key, landmarks, scores, labels):
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float32).tobytes()
+        scores = np.ascontiguousarray(scores, dtype=np.float32).tobytes()
+        labels = ",".join(labels)
+        size = len(key) + len(landmarks) + len(scores) + len(labels) + ENTRY_OVERHEAD
+        old = self.db.execute("SELECT size FROM landmarks WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO landmarks VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, landmarks, scores, labels, size, self.tick()))
+        self.total += size - (old[0] if old else 0)
+        self.entries += old is None
+
+    def evict(self):
+        # Remove as menos usadas até sobrar uma folga de 10%, para não remover a cada escrita
+        if self.total <= self.max_bytes:
+            return
+        excess = self.total - int(0.9 * self.max_bytes)
+        keys = []
+        for key, size in self.db.execute("SELECT key, size FROM landmarks ORDER BY used"):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+            self.total -= size
+        self.db.executemany("DELETE FROM landmarks WHERE key = ?", keys)
+        self.entries -= len(keys)
+        self.evicted += len(keys)
+
+    def flush(self):
+        self.evict()
+        self.db.commit()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return (f"Cache de landmarks {self.path}: {self.hits} acertos, {self.misses} faltas ({rate:.1f}%), "
+                f"{self.entries} entradas, {self.total / 1e6:.1f} MB, {self.evicted} removidas")
+
+
+class CachedHands:
+    """Envolve um MediaPipe Hands: process() devolve o resultado guardado ou
+    roda o MediaPipe e guarda o resultado.
+
+    O Hands rastreia a mão entre quadros; com o cache, ele só vê os quadros
+    que faltaram, então um resultado novo pode diferir um pouco do que o voo
+    contínuo daria."""
+
+    def __init__(self, hands, cache, namespace="", frame_key=None):
+        self.hands = hands
+        self.cache = cache
+        self.namespace = namespace.encode()
+        self.frame_key = frame_key
+        self.last_frame = None
+        self.calls = 0
+
+    def key(self, image):
+        digest = hashlib.sha256(self.namespace)
+        digest.update(str(image.shape).encode())
+        if self.frame_key is None:
+            digest.update(np.ascontiguousarray(image).data)
+        else:
+            frame = self.frame_key()
+            self.calls = self.calls + 1 if frame == self.last_frame else 0
+            self.last_frame = frame
+            digest.update(repr((frame, self.calls)).encode())
+        return digest.digest()[:16]
+
+    def process(self, image):
+        key = self.key(image)
+        cached = self.cache.get(key)
+        if cached is not None:
+            landmarks, scores, labels = cached
+            return HandsResults([landmarks_to_mediapipe(hand) for hand in landmarks],
+                                [handedness_to_mediapipe(label, score) for label, score in zip(labels, scores)])
+
+        results = self.hands.process(image)
+        self.cache.put(key, *hands_to_arrays(results))
+        return results
@@ -2,7 +2,7 @@ import py_trees
 import time
 import tkinter as tk
 from tkinter import ttk
-from djitellopy import Tello
+from tello_sim import create_tello
 import cv2
 import mediapipe as mp
 import numpy as np
@@ -67,7 +67,7 @@ class TelloControlGUI:
         self.run_mission()
 
     def run_mission(self):
-        self.drone = Tello()
+        self.drone = create_tello()
         try:
             self.drone.connect()
             print("Conectado com sucesso ao drone Tello")
@@ -1,15 +1,41 @@
 #diferenca para a v2 = verifica se a camera funciona antes de dar takeoof
 
 
+import os
 import py_trees
+import queue
 import time
 import tkinter as tk
 from tkinter import ttk
-from djitellopy import Tello
+from tello_sim import create_tello
+from detectors import get_hands
+from capture import CaptureThread, FrameGate
+from inference_pool import InferencePool
+from gesture_filter import HandFilters, hand_keys
+from roi import RoiTracker
+from quality import QualityController
+from control_loop import ControlLoop, SharedSettings
+from tree_profiler import TreeProfiler
+from dispatcher import COMMAND_TIMEOUTS, CommandDispatcher, is_ok
+from rc_control import RcStreamer, hand_velocity
+from display import DisplaySink
+from recorder import VideoRecorder, recording_path
+from flight_log import FlightLog, log_path
+from gesture_classifier import to_array
+from telemetry import TelemetryCache
 import cv2
 import mediapipe as mp
 import numpy as np
 
+# Zonas da tela usadas pelo controle por gestos (0 = nenhuma mão)
+ZONES = (None, "up", "down", "left", "right", "center")
+
+# Tempo máximo esperando a resposta de um movimento (s)
+MOVE_TIMEOUT = 10
+
+# Folga além do timeout do despachante antes de um DroneCommand desistir (s)
+ACK_MARGIN = 2
+
 
 class TelloControlGUI:
     def __init__(self, master):
@@ -28,12 +54,40 @@ class TelloControlGUI:
         self.start_button = ttk.Button(master, text="Iniciar Missão", command=self.start_mission)
         self.start_button.grid(row=1, column=0, columnspan=2, pady=10)
 
+        self.loop_status = tk.StringVar(value="Laço de controle parado")
+        ttk.Label(master, textvariable=self.loop_status).grid(row=2, column=0, columnspan=2, pady=(0, 10))
+
+        # Medidas ao vivo: quadros processados por segundo e tempo de cada comportamento no tick
+        self.profile_frame = ttk.LabelFrame(master, text="Desempenho Medido")
+        self.profile_frame.grid(row=3, column=0, columnspan=2, padx=10, pady=(0, 10), sticky="nsew")
+        self.measured_fps = tk.StringVar(value="-")
+        ttk.Label(self.profile_frame, text="FPS Processado:").grid(row=0, column=0, sticky="w")
+        ttk.Label(self.profile_frame, textvariable=self.measured_fps).grid(row=0, column=1, sticky="w")
+        self.profile_text = tk.StringVar(value="")
+        ttk.Label(self.profile_frame, textvariable=self.profile_text, font="TkFixedFont",
+                  justify="left").grid(row=1, column=0, columnspan=2, sticky="w")
+
+        self.control_loop = None
+        self.dispatcher = None
+        self.settings = None
+        self.sent_values = {}
+        self.telemetry = None
+        self.flight_log = None
+        self.profiler = None
+
     def create_performance_widgets(self):
         self.frame_rate = tk.IntVar(value=30)
         self.resolution = tk.IntVar(value=720)
         self.detection_confidence = tk.DoubleVar(value=0.7)
         self.skip_frames = tk.IntVar(value=0)
         self.draw_landmarks = tk.BooleanVar(value=True)
+        self.inference_workers = tk.IntVar(value=0)
+        self.roi_tracking = tk.BooleanVar(value=False)
+        self.record_video = tk.BooleanVar(value=False)
+        self.record_flight = tk.BooleanVar(value=True)
+        self.auto_quality = tk.BooleanVar(value=False)
+        self.latency_budget = tk.IntVar(value=50)
+        self.measured_latency = tk.StringVar(value="-")
 
         ttk.Label(self.performance_frame, text="Taxa de Quadros:").grid(row=0, column=0, sticky="w")
         ttk.Scale(self.performance_frame, from_=5, to=30, variable=self.frame_rate, orient="horizontal").grid(row=0, column=1)
@@ -50,12 +104,31 @@ class TelloControlGUI:
         ttk.Scale(self.performance_frame, from_=0, to=5, variable=self.skip_frames, orient="horizontal").grid(row=3, column=1)
         ttk.Label(self.performance_frame, textvariable=self.skip_frames).grid(row=3, column=2)
 
-        ttk.Checkbutton(self.performance_frame, text="Desenhar Landmarks", variable=self.draw_landmarks).grid(row=4, column=0, columnspan=3)
+        ttk.Label(self.performance_frame, text="Processos de Inferência:").grid(row=4, column=0, sticky="w")
+        ttk.Spinbox(self.performance_frame, from_=0, to=os.cpu_count() or 1, textvariable=self.inference_workers, width=5).grid(row=4, column=1, sticky="w")
+
+        ttk.Checkbutton(self.performance_frame, text="Desenhar Landmarks", variable=self.draw_landmarks).grid(row=5, column=0, columnspan=3)
+        ttk.Checkbutton(self.performance_frame, text="Rastrear Região da Mão", variable=self.roi_tracking).grid(row=6, column=0, columnspan=3)
+        ttk.Checkbutton(self.performance_frame, text="Gravar Vídeo", variable=self.record_video).grid(row=10, column=0, columnspan=3)
+        ttk.Checkbutton(self.performance_frame, text="Registrar Voo", variable=self.record_flight).grid(row=11, column=0, columnspan=3)
+
+        # No modo automático os controles acima passam a mostrar os valores escolhidos
+        ttk.Checkbutton(self.performance_frame, text="Qualidade Automática", variable=self.auto_quality).grid(row=7, column=0, columnspan=3)
+
+        ttk.Label(self.performance_frame, text="Orçamento de Latência (ms):").grid(row=8, column=0, sticky="w")
+        ttk.Entry(self.performance_frame, textvariable=self.latency_budget, width=6).grid(row=8, column=1, sticky="w")
+
+        ttk.Label(self.performance_frame, text="Latência Medida:").grid(row=9, column=0, sticky="w")
+        ttk.Label(self.performance_frame, textvariable=self.measured_latency).grid(row=9, column=1, sticky="w")
 
     def create_mission_widgets(self):
         self.move_distance = tk.IntVar(value=20)
         self.stabilize_time = tk.DoubleVar(value=3.0)
         self.tick_interval = tk.DoubleVar(value=0.1)
+        self.gesture_window = tk.IntVar(value=5)
+        self.gesture_votes = tk.IntVar(value=3)
+        self.rc_mode = tk.BooleanVar(value=False)
+        self.rc_speed = tk.IntVar(value=40)
 
         ttk.Label(self.mission_frame, text="Distância de Movimento (cm):").grid(row=0, column=0, sticky="w")
         ttk.Entry(self.mission_frame, textvariable=self.move_distance).grid(row=0, column=1)
@@ -66,12 +139,23 @@ class TelloControlGUI:
         ttk.Label(self.mission_frame, text="Intervalo de Tick (s):").grid(row=2, column=0, sticky="w")
         ttk.Entry(self.mission_frame, textvariable=self.tick_interval).grid(row=2, column=1)
 
+        ttk.Label(self.mission_frame, text="Janela de Gestos (quadros):").grid(row=3, column=0, sticky="w")
+        ttk.Spinbox(self.mission_frame, from_=1, to=15, textvariable=self.gesture_window, width=5).grid(row=3, column=1, sticky="w")
+
+        ttk.Label(self.mission_frame, text="Votos para Aceitar Gesto:").grid(row=4, column=0, sticky="w")
+        ttk.Spinbox(self.mission_frame, from_=1, to=15, textvariable=self.gesture_votes, width=5).grid(row=4, column=1, sticky="w")
+
+        ttk.Checkbutton(self.mission_frame, text="Controle Contínuo (rc)", variable=self.rc_mode).grid(row=5, column=0, columnspan=2, sticky="w")
+
+        ttk.Label(self.mission_frame, text="Velocidade rc (%):").grid(row=6, column=0, sticky="w")
+        ttk.Scale(self.mission_frame, from_=10, to=100, variable=self.rc_speed, orient="horizontal").grid(row=6, column=1)
+
     def start_mission(self):
         print("Iniciando missão com as configurações atuais...")
         self.run_mission()
 
     def run_mission(self):
-        self.drone = Tello()
+        self.drone = create_tello()
         try:
             self.drone.connect()
             print("Conectado com sucesso ao drone Tello")
@@ -86,15 +170,33 @@ class TelloControlGUI:
             print("Erro ao iniciar a transmissão de vídeo do drone.")
             return
 
-        self.behavior_tree = py_trees.trees.BehaviourTree(create_root(self))
+        # Registro binário do voo (missao_<data>.fdr); as respostas chegam pelo despachante
+        self.flight_log = None
+        if self.record_flight.get():
+            self.telemetry = TelemetryCache(self.drone).start()
+            self.flight_log = FlightLog(log_path("missao"), [zone or "none" for zone in ZONES],
+                                        self.telemetry).open()
+
+        # Os comandos com resposta saem por uma thread própria; os comportamentos não bloqueiam
+        on_response = self.flight_log.log_command if self.flight_log is not None else None
+        self.dispatcher = CommandDispatcher(self.drone, on_response=on_response).start()
+
+        # Os comportamentos leem uma cópia das variáveis; o Tk só é tocado nesta thread
+        self.sent_values = self.read_variables()
+        self.settings = SharedSettings(self.sent_values, queue.Queue())
+        self.behavior_tree = py_trees.trees.BehaviourTree(create_root(self.settings))
+        self.profiler = TreeProfiler()
         
         try:
-            self.behavior_tree.setup(timeout=15, drone=self.drone)
+            self.behavior_tree.setup(timeout=15, drone=self.drone, dispatcher=self.dispatcher,
+                                     flight_log=self.flight_log, profiler=self.profiler)
         except Exception as e:
             print(f"Erro ao configurar a árvore de comportamento: {e}")
             return
 
-        self.tick()
+        self.start_button.state(["disabled"])
+        self.control_loop = ControlLoop(self.behavior_tree, self.settings, profiler=self.profiler).start()
+        self.poll_control_loop()
 
     def check_video_stream(self):
         print("Verificando a transmissão de vídeo...")
@@ -111,13 +213,83 @@ class TelloControlGUI:
         print("Transmissão de vídeo funcionando.")
         return True
 
-    def tick(self):
+    def tk_variables(self):
+        return {name: var for name, var in vars(self).items() if isinstance(var, tk.Variable)
+                and name not in ("loop_status", "profile_text")}
+
+    def read_variables(self):
+        values = {}
+        for name, var in self.tk_variables().items():
+            try:
+                values[name] = var.get()
+            except tk.TclError:
+                # Campo sendo editado (vazio ou incompleto): mantém o último valor
+                values[name] = self.sent_values.get(name)
+        return values
+
+    def poll_control_loop(self):
+        # Alterações da GUI -> laço de controle
+        for name, value in self.read_variables().items():
+            if value != self.sent_values.get(name):
+                self.sent_values[name] = value
+                self.control_loop.set(name, value)
+
+        # Eventos do laço de controle -> GUI
+        while True:
+            try:
+                event = self.settings.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "var":
+                _, name, value = event
+                self.sent_values[name] = value
+                self.tk_variables()[name].set(value)
+            elif event[0] == "stats":
+                self.loop_status.set(event[1])
+            elif event[0] == "profile":
+                self.profile_text.set(event[1])
+            elif event[0] == "error":
+                print(f"Erro durante a execução da árvore: {event[1]}")
+                self.finish()
+                self.terminate()
+                return
+            elif event[0] == "done":
+                print(f"Missão finalizada: {event[1]}")
+                self.finish()
+                if event[1] == py_trees.common.Status.FAILURE and self.takeoff_sent():
+                    # Decolagem ou pouso falhou: o drone pode estar no ar, e o end()
+                    # só pousa se o djitellopy souber que ele decolou
+                    self.terminate()
+                else:
+                    self.drone.end()
+                return
+
+        self.master.after(50, self.poll_control_loop)
+
+    def finish(self):
+        self.control_loop.stop(timeout=5)
+        print(self.control_loop.summary())
+        self.dispatcher.stop(timeout=25)
+        print(self.dispatcher.summary())
+        # Com o despachante parado, o socket de comandos é só desta thread
         try:
-            self.behavior_tree.tick()
-            self.master.after(int(self.tick_interval.get() * 1000), self.tick)
+            self.drone.streamoff()
         except Exception as e:
-            print(f"Erro durante a execução da árvore: {e}")
-            self.terminate()
+            print(f"Erro ao desligar o vídeo: {e}")
+        if self.flight_log is not None:
+            self.flight_log.close()
+            print(self.flight_log.summary())
+            self.telemetry.stop()
+        self.loop_status.set(self.control_loop.status_line())
+        self.profile_text.set("\n".join(self.profiler.table()))
+        self.start_button.state(["!disabled"])
+
+    def takeoff_sent(self):
+        # O despachante envia o que ficou na fila ao parar, então basta não ter sido cancelado
+        for behaviour in self.behavior_tree.root.iterate():
+            if isinstance(behaviour, TakeOff):
+                return behaviour.future is not None and not behaviour.future.cancelled()
+        return False
 
     def terminate(self):
         print("Tentando pousar o drone...")
@@ -126,42 +298,90 @@ class TelloControlGUI:
             print("Drone pousou com sucesso")
         except Exception as e:
             print(f"Erro ao pousar o drone: {e}")
+            print("Desligando os motores (emergency)")
+            try:
+                self.drone.send_control_command("emergency")
+            except Exception as e:
+                print(f"Erro ao enviar emergency: {e}")
         self.drone.end()
 
-class TakeOff(py_trees.behaviour.Behaviour):
-    def __init__(self, name="Decolar"):
-        super().__init__(name)
-        self.drone = None
+class DroneCommand(py_trees.behaviour.Behaviour):
+    """Envia um comando pelo despachante e fica RUNNING até a resposta do drone.
+    Sem resposta dentro do timeout, ou com resposta de erro, retorna FAILURE.
 
-    def setup(self, **kwargs):
-        try:
-            self.drone = kwargs['drone']
-            return True
-        except KeyError as e:
-            self.logger.error('setup() deve ser chamado com o argumento "drone"')
-            return False
+    O timeout só corre depois que o despachante tira o comando da fila, e por
+    padrão é o dele (``COMMAND_TIMEOUTS``) mais ``ACK_MARGIN``: o comportamento
+    não desiste antes do despachante. ``flying_after`` atualiza o
+    ``drone.is_flying`` quando o ack chega, mesmo depois do timeout, para o
+    end() do djitellopy saber se precisa pousar."""
 
-    def update(self):
-        self.drone.takeoff()
-        return py_trees.common.Status.SUCCESS
+    flying_after = None
 
-class Land(py_trees.behaviour.Behaviour):
-    def __init__(self, name="Pousar"):
+    def __init__(self, name, command, timeout=None):
         super().__init__(name)
+        self.command = command
+        self.timeout = timeout
         self.drone = None
+        self.dispatcher = None
+        self.future = None
+        self.sent_time = None
 
     def setup(self, **kwargs):
         try:
-            self.drone = kwargs['drone']
+            self.dispatcher = kwargs['dispatcher']
+            self.drone = kwargs.get('drone')
+            if self.timeout is None:
+                verb = self.command.split()[0]
+                self.timeout = COMMAND_TIMEOUTS.get(verb, self.dispatcher.timeout) + ACK_MARGIN
             return True
         except KeyError as e:
-            self.logger.error('setup() deve ser chamado com o argumento "drone"')
+            self.logger.error('setup() deve ser chamado com o argumento "dispatcher"')
             return False
 
+    def initialise(self):
+        self.future = self.dispatcher.send(self.command)
+        self.sent_time = None
+        if self.future is not None:
+            self.future.add_done_callback(self.record_ack)
+
+    def record_ack(self, future):
+        # Roda na thread do despachante
+        if self.flying_after is None or self.drone is None or future.cancelled():
+            return
+        if is_ok(self.command, future.result()):
+            self.drone.is_flying = self.flying_after
+
     def update(self):
-        self.drone.land()
+        if self.future is None or self.future.cancelled():
+            self.feedback_message = f"{self.command} descartado"
+            return py_trees.common.Status.FAILURE
+        if not self.future.done():
+            if self.future.running():
+                if self.sent_time is None:
+                    self.sent_time = time.time()
+                elif time.time() - self.sent_time > self.timeout:
+                    self.feedback_message = f"{self.command} sem resposta em {self.timeout} s"
+                    return py_trees.common.Status.FAILURE
+            return py_trees.common.Status.RUNNING
+
+        response = self.future.result()
+        if not is_ok(self.command, response):
+            self.feedback_message = f"{self.command}: {response}"
+            return py_trees.common.Status.FAILURE
         return py_trees.common.Status.SUCCESS
 
+class TakeOff(DroneCommand):
+    flying_after = True
+
+    def __init__(self, name="Decolar"):
+        super().__init__(name, "takeoff")
+
+class Land(DroneCommand):
+    flying_after = False
+
+    def __init__(self, name="Pousar"):
+        super().__init__(name, "land")
+
 class Stabilize(py_trees.behaviour.Behaviour):
     def __init__(self, name="Estabilizar", duration=5.0):
         super().__init__(name)
@@ -186,76 +406,257 @@ class GestureControl(py_trees.behaviour.Behaviour):
         self.gui = gui
         self.last_frame_time = 0
         self.frame_count = 0
+        self.capture = None
+        self.frame_gate = FrameGate()
+        self.pool = None
+        self.gesture_filters = None
+        self.roi_tracker = None
+        self.quality = None
+        self.dispatcher = None
+        self.move = None
+        self.move_command = None
+        self.move_time = 0
+        self.rc = None
+        self.display = None
+        self.raw_recorder = None
+        self.annotated_recorder = None
+        self.flight_log = None
+        self.profiler = None
+        self.fps = 0.0
+        self.last_handled = None
 
     def setup(self, **kwargs):
         try:
             self.drone = kwargs['drone']
+            self.dispatcher = kwargs['dispatcher']
+            self.flight_log = kwargs.get('flight_log')
+            self.profiler = kwargs.get('profiler')
             self.drone.streamon()
-            self.hands = self.mp_hands.Hands(
+            hands_options = dict(
                 static_image_mode=False,
                 max_num_hands=1,
                 min_detection_confidence=self.gui.detection_confidence.get()
             )
+            self.hands = get_hands(**hands_options)
+            self.quality = QualityController(self.gui.latency_budget.get() / 1000.0)
+            if self.gui.roi_tracking.get():
+                self.roi_tracker = RoiTracker(self.hands)
+            if self.gui.inference_workers.get() > 0:
+                self.pool = InferencePool(self.gui.inference_workers.get(), options=hands_options).start()
+            window = self.gui.gesture_window.get()
+            self.gesture_filters = HandFilters(window=window, votes=min(self.gui.gesture_votes.get(), window))
+            if self.gui.rc_mode.get():
+                on_send = self.flight_log.log_rc if self.flight_log is not None else None
+                self.rc = RcStreamer(self.drone, on_send=on_send).start()
+            self.capture = CaptureThread(self.drone.get_frame_read()).start()
+            # A janela é desenhada fora do tick; TELLO_HEADLESS=1 desliga janela e desenhos
+            self.display = DisplaySink('Controle por Gestos').start()
+            if self.gui.record_video.get():
+                self.raw_recorder = VideoRecorder(recording_path("missao", "bruto")).start()
+                self.annotated_recorder = VideoRecorder(recording_path("missao", "anotado")).start()
             return True
         except KeyError as e:
             self.logger.error('setup() deve ser chamado com o argumento "drone"')
             return False
 
-    def update(self):
-        current_time = time.time()
-        if current_time - self.last_frame_time < 1/self.gui.frame_rate.get():
-            return py_trees.common.Status.RUNNING
+    def next_frame(self):
+        # Só processa quando a captura publicou um quadro novo
+        packet = self.capture.poll()
+        if packet is None or not self.frame_gate.is_new(packet.frame, packet.seq):
+            return None
 
         self.frame_count += 1
         if self.frame_count % (self.gui.skip_frames.get() + 1) != 0:
-            return py_trees.common.Status.RUNNING
+            return None
 
-        frame = self.drone.get_frame_read().frame
+        frame = packet.frame
         if self.gui.resolution.get() != 720:
             frame = cv2.resize(frame, (self.gui.resolution.get() * 16 // 9, self.gui.resolution.get()))
+        if self.raw_recorder is not None:
+            self.raw_recorder.write(frame)
+        return frame
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(frame_rgb)
+    def update(self):
+        if self.display.quit_requested:
+            return py_trees.common.Status.SUCCESS
+
+        current_time = time.time()
+        if current_time - self.last_frame_time < 1/self.gui.frame_rate.get():
+            return py_trees.common.Status.RUNNING
 
+        start = time.perf_counter()
+        frame = self.next_frame()
+        if self.pool is None:
+            if frame is None:
+                return py_trees.common.Status.RUNNING
+            if self.roi_tracker is not None:
+                results = self.roi_tracker.process(frame)
+            else:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                results = self.hands.process(frame_rgb)
+            self.measure_fps()
+            self.adapt_quality(time.perf_counter() - start)
+            return self.handle_results(frame, results, current_time, self.frame_gate.last_seq)
+
+        # Com o pool, envia o quadro novo e trata o resultado que já estiver pronto
+        if frame is not None:
+            self.pool.submit(frame, self.frame_gate.last_seq)
+        result = self.pool.get(timeout=0)
+        if result is None:
+            return py_trees.common.Status.RUNNING
+        self.measure_fps()
+        self.adapt_quality(result.elapsed + time.perf_counter() - start)
+        try:
+            return self.handle_results(result.frame, result.to_mediapipe(), current_time, result.seq)
+        finally:
+            self.pool.release(result)
+
+    def zone(self, frame, hand_landmarks):
+        index_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
+        h, w, _ = frame.shape
+        cx, cy = int(index_tip.x * w), int(index_tip.y * h)
+
+        if cy < h // 3:
+            return "up"
+        elif cy > 2 * h // 3:
+            return "down"
+        elif cx < w // 3:
+            return "left"
+        elif cx > 2 * w // 3:
+            return "right"
+        return "center"
+
+    def adapt_quality(self, elapsed):
+        # Mede só a percepção; os comandos do drone bloqueiam por segundos e não entram
+        if self.gui.auto_quality.get():
+            self.quality.budget = self.gui.latency_budget.get() / 1000.0
+            if self.quality.record(elapsed):
+                level = self.quality.level
+                self.gui.resolution.set(level.resolution)
+                self.gui.skip_frames.set(level.skip_frames)
+                self.gui.frame_rate.set(level.frame_rate)
+        else:
+            self.quality.observe(elapsed)
+        self.gui.measured_latency.set(f"{1000 * self.quality.latency:.1f} ms")
+        self.gui.measured_fps.set(f"{self.fps:.1f}")
+
+    def measure_fps(self):
+        # Média móvel dos quadros tratados por segundo (não a taxa configurada)
+        now = time.perf_counter()
+        if self.last_handled is not None and now > self.last_handled:
+            rate = 1.0 / (now - self.last_handled)
+            self.fps = rate if self.fps == 0 else 0.9 * self.fps + 0.1 * rate
+        self.last_handled = now
+
+    def handle_results(self, frame, results, current_time, seq=-1):
+        observations = {}
+        landmarks = {}
         if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                if self.gui.draw_landmarks.get():
+            for hand_landmarks, (hand, score) in zip(results.multi_hand_landmarks, hand_keys(results)):
+                if self.gui.draw_landmarks.get() and not self.display.headless:
                     self.mp_drawing.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                
-                index_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                h, w, _ = frame.shape
-                cx, cy = int(index_tip.x * w), int(index_tip.y * h)
-
-                if cy < h // 3:
-                    self.drone.move_up(self.gui.move_distance.get())
-                elif cy > 2 * h // 3:
-                    self.drone.move_down(self.gui.move_distance.get())
-                elif cx < w // 3:
-                    self.drone.move_left(self.gui.move_distance.get())
-                elif cx > 2 * w // 3:
-                    self.drone.move_right(self.gui.move_distance.get())
-                else:
-                    self.drone.send_rc_control(0, 0, 0, 0)
-
-        self.overlay_info(frame)
-
-        cv2.imshow('Controle por Gestos', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            return py_trees.common.Status.SUCCESS
+                observations[hand] = (ZONES.index(self.zone(frame, hand_landmarks)), score)
+                if self.flight_log is not None:
+                    landmarks[hand] = to_array(hand_landmarks.landmark)
+
+        active = {}
+        if self.rc is not None:
+            self.send_velocity(results)
+        else:
+            active = self.move_by_zone(observations)
+
+        if self.flight_log is not None:
+            # Uma posição por mão do quadro: o filtro também guarda as mãos que sumiram
+            self.flight_log.log_frame(seq, [landmarks[hand] for hand in observations],
+                                      [observations[hand][0] for hand in observations],
+                                      [active.get(hand, 0) for hand in observations])
+
+        if not self.display.headless:
+            self.overlay_info(frame)
+            self.display.show(frame)
+        if self.annotated_recorder is not None:
+            self.annotated_recorder.write(frame)
 
         self.last_frame_time = current_time
         return py_trees.common.Status.RUNNING
 
+    def send_velocity(self, results):
+        # Modo contínuo: a posição do indicador vira velocidade; sem mão, para na hora
+        if not results.multi_hand_landmarks:
+            self.rc.zero()
+            return
+        index_tip = results.multi_hand_landmarks[0].landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
+        left_right, up_down = hand_velocity(index_tip.x, index_tip.y, speed=self.gui.rc_speed.get())
+        self.rc.set(left_right, 0, up_down, 0)
+
+    def move_by_zone(self, observations):
+        # Só move quando a zona se manteve por quadros suficientes
+        self.check_move()
+        active = self.gesture_filters.update(observations)
+        for zone_id in active.values():
+            zone = ZONES[zone_id]
+            if zone in ("up", "down", "left", "right"):
+                self.start_move(f"{zone} {self.gui.move_distance.get()}")
+            elif zone == "center":
+                self.drone.send_rc_control(0, 0, 0, 0)
+                if self.flight_log is not None:
+                    self.flight_log.log_rc(0, 0, 0, 0)
+        return active
+
+    def start_move(self, command):
+        # Um movimento por vez; a percepção continua enquanto o drone se move
+        if self.move is None:
+            self.move = self.dispatcher.send(command)
+            self.move_command = command
+            self.move_time = time.time()
+
+    def check_move(self):
+        if self.move is None:
+            return
+        if not self.move.done():
+            if time.time() - self.move_time > MOVE_TIMEOUT:
+                print(f"Movimento sem resposta: {self.move_command}")
+                self.move = None
+            return
+        if not self.move.cancelled() and not is_ok(self.move_command, self.move.result()):
+            print(f"Erro no movimento {self.move_command}: {self.move.result()}")
+        self.move = None
+
     def overlay_info(self, frame):
-        info = f"FPS: {self.gui.frame_rate.get()} | Res: {self.gui.resolution.get()}p"
-        info += f" | Conf: {self.gui.detection_confidence.get():.2f}"
-        info += f" | Pular: {self.gui.skip_frames.get()}"
-        info += f" | Mover: {self.gui.move_distance.get()}cm"
-        cv2.putText(frame, info, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        # Valores medidos, não os configurados: FPS tratado, percepção e mediana de cada comportamento
+        lines = [f"FPS: {self.fps:.1f} | Res: {self.gui.resolution.get()}p"
+                 f" | Percepcao: {1000 * self.quality.latency:.1f} ms"]
+        if self.profiler is not None:
+            lines.append(" | ".join(f"{name}: {p50:.1f} ms" for name, p50 in self.profiler.p50s()))
+        for i, info in enumerate(lines):
+            cv2.putText(frame, info, (10, 30 + 25 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
     def terminate(self, new_status):
-        self.drone.streamoff()
-        cv2.destroyAllWindows()
+        if self.capture is not None:
+            self.capture.stop()
+        if self.display is not None:
+            self.display.stop()
+            print(self.display.summary())
+        for recorder in (self.raw_recorder, self.annotated_recorder):
+            if recorder is not None:
+                recorder.stop()
+                print(recorder.summary())
+        self.raw_recorder = self.annotated_recorder = None
+        if self.rc is not None:
+            self.rc.stop()
+            print(self.rc.summary())
+            self.rc = None
+        print(self.frame_gate.summary())
+        if self.gesture_filters is not None:
+            print(self.gesture_filters.summary())
+        if self.roi_tracker is not None:
+            print(self.roi_tracker.summary())
+        if self.quality is not None and self.gui.auto_quality.get():
+            print(self.quality.summary())
+        if self.pool is not None:
+            print(self.pool.summary())
+            self.pool.close()
+            self.pool = None
 
 def create_root(gui):
     root = py_trees.composites.Sequence("Raiz", memory=True)
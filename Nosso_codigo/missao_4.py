@@ -2,7 +2,7 @@ import py_trees
 import time
 import tkinter as tk
 from tkinter import ttk
-from djitellopy import Tello
+from tello_sim import create_tello
 import cv2
 import mediapipe as mp
 import numpy as np
@@ -216,7 +216,7 @@ def main():
     gui = TelloControlGUI(root)
     
     def run_mission():
-        drone = Tello()
+        drone = create_tello()
         try:
             drone.connect()
             print("Conectado com sucesso ao drone Tello")
@@ -0,0 +1,99 @@
+"""Medição de latência por estágio do pipeline (percentis e FPS sustentado)."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.frames = 0
+        self.first_frame_time = None
+        self.last_frame_time = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        # Os comandos do drone rodam em outras threads
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def frame(self):
+        now = time.perf_counter()
+        if self.first_frame_time is None:
+            self.first_frame_time = now
+        self.last_frame_time = now
+        self.frames += 1
+
+    def fps(self):
+        if self.frames < 2:
+            return 0.0
+        return (self.frames - 1) / (self.last_frame_time - self.first_frame_time)
+
+    def summary(self):
+        """Estatísticas por estágio, em milissegundos."""
+        result = {}
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+        for name, values in samples.items():
+            ms = np.asarray(values) * 1000.0
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            result[name] = {
+                "count": int(ms.size),
+                "mean": float(ms.mean()),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(ms.max()),
+            }
+        return result
+
+    def report(self, title):
+        lines = [f"== {title}: {self.frames} frames, {self.fps():.1f} FPS sustentado",
+                 f"{'estágio':<26}{'n':>7}{'média':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<26}{stats['count']:>7}{stats['mean']:>9.2f}{stats['p50']:>9.2f}"
+                         f"{stats['p95']:>9.2f}{stats['p99']:>9.2f}{stats['max']:>9.2f}")
+        return "\n".join(lines)
+
+
+class TimedProxy:
+    """Envolve um objeto e mede, no StageTimer, o tempo dos atributos indicados
+    em ``stages`` ({atributo: estágio}). Métodos têm a chamada medida; atributos
+    comuns (como ``frame_read.frame``) têm o acesso medido. ``overrides``
+    substitui atributos, por exemplo para desligar o ``cv2.imshow``."""
+
+    def __init__(self, target, timer, stages, overrides=None):
+        self._target = target
+        self._timer = timer
+        self._stages = stages
+        self._overrides = overrides or {}
+
+    def __getattr__(self, name):
+        if name in self._overrides:
+            return self._overrides[name]
+
+        stage = self._stages.get(name)
+        if stage is None:
+            return getattr(self._target, name)
+
+        start = time.perf_counter()
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            self._timer.add(stage, time.perf_counter() - start)
+            return attr
+
+        def timed(*args, **kwargs):
+            with self._timer.stage(stage):
+                return attr(*args, **kwargs)
+        return timed
@@ -0,0 +1,61 @@
+"""Controlador PID de vários eixos de uma vez.
+
+Ganhos, limites e estados são arrays do NumPy, um elemento por eixo (por
+exemplo yaw, sobe/desce e frente/trás). O ``dt`` vem dos instantes dos quadros,
+então os ganhos I e D valem por segundo e não mudam com a taxa de quadros.
+
+Anti-windup por integração condicional: num eixo saturado, o erro só entra na
+integral se ajudar a sair da saturação. A integral também pode ter um limite
+próprio (``integral_limit``).
+"""
+
+import numpy as np
+
+
+class PID:
+    def __init__(self, kp, ki=0.0, kd=0.0, limit=100.0, integral_limit=None):
+        self.kp = np.asarray(kp, dtype=np.float64)
+        shape = self.kp.shape
+        self.ki = np.broadcast_to(np.asarray(ki, dtype=np.float64), shape)
+        self.kd = np.broadcast_to(np.asarray(kd, dtype=np.float64), shape)
+        self.limit = np.broadcast_to(np.asarray(limit, dtype=np.float64), shape)
+        self.integral_limit = None if integral_limit is None else \
+            np.broadcast_to(np.asarray(integral_limit, dtype=np.float64), shape)
+
+        self.integral = np.zeros(shape)
+        self.last_error = None
+        self.last_time = None
+        self.output = np.zeros(shape)
+
+    def reset(self):
+        self.integral[:] = 0.0
+        self.last_error = None
+        self.last_time = None
+        self.output = np.zeros_like(self.output)
+
+    def update(self, error, timestamp):
+        """Erro de cada eixo no instante ``timestamp`` (s) -> saída limitada."""
+        error = np.asarray(error, dtype=np.float64)
+        dt = 0.0 if self.last_time is None else timestamp - self.last_time
+        if dt < 0:
+            # Quadro fora de ordem: ignora em vez de estragar a derivada
+            return self.output
+
+        if dt > 0:
+            derivative = (error - self.last_error) / dt
+            integral = self.integral + error * dt
+            if self.integral_limit is not None:
+                integral = np.clip(integral, -self.integral_limit, self.integral_limit)
+        else:
+            derivative = np.zeros_like(error)
+            integral = self.integral
+
+        unclamped = self.kp * error + self.ki * integral + self.kd * derivative
+        windup = (np.abs(unclamped) > self.limit) & (np.sign(unclamped) == np.sign(error))
+        self.integral = np.where(windup, self.integral, integral)
+
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        self.output = np.clip(output, -self.limit, self.limit)
+        self.last_error = error
+        self.last_time = timestamp
+        return self.output
@@ -0,0 +1,149 @@
+"""Controle automático da qualidade do processamento.
+
+O QualityController recebe o tempo de processamento de cada quadro e ajusta a
+qualidade por dois laços separados, cada um com o sinal que ele consegue mudar:
+
+- latência: a média móvel exponencial do tempo de um quadro só cai baixando a
+  resolução, então este laço anda só pela escada de ``resolutions`` para
+  segurar a média dentro do orçamento. Desce depois de ``patience`` quadros
+  seguidos acima do orçamento e sobe depois de ``3 * patience`` quadros
+  seguidos com folga;
+- carga: pular quadros e baixar a taxa não deixam um quadro mais rápido, só
+  diminuem quantos são processados por segundo. Este laço mede a fração do
+  tempo gasta processando (segundos de processamento por segundo, em janelas de
+  ``load_window``) e anda pela escada de ``rates`` para mantê-la abaixo de
+  ``max_load``. Só volta para uma taxa maior se a carga prevista nela (a atual
+  proporcional aos quadros por segundo) couber com folga.
+"""
+
+import collections
+import time
+
+QualityLevel = collections.namedtuple("QualityLevel", ["resolution", "skip_frames", "frame_rate"])
+RateLevel = collections.namedtuple("RateLevel", ["skip_frames", "frame_rate"])
+
+# Do melhor para o mais leve
+RESOLUTIONS = (720, 480, 360)
+RATE_LEVELS = [
+    RateLevel(0, 30),
+    RateLevel(1, 30),
+    RateLevel(2, 20),
+    RateLevel(3, 15),
+]
+
+
+def frames_per_second(rate):
+    return rate.frame_rate / (rate.skip_frames + 1)
+
+
+class QualityController:
+    def __init__(self, budget=0.05, resolutions=RESOLUTIONS, rates=RATE_LEVELS, alpha=0.2, patience=10,
+                 headroom=0.7, max_load=0.8, load_window=2.0, load_patience=2):
+        self.budget = budget
+        self.resolutions = resolutions
+        self.rates = rates
+        self.alpha = alpha
+        self.patience = patience
+        self.headroom = headroom
+        self.max_load = max_load
+        self.load_window = load_window
+        self.load_patience = load_patience
+
+        self.resolution_index = 0
+        self.rate_index = 0
+        self.latency = None  # média móvel em segundos
+        self.over = 0
+        self.under = 0
+
+        self.load = None  # fração do tempo processando, na última janela
+        self.window_start = None
+        self.busy = 0.0
+        self.load_over = 0
+        self.load_under = 0
+        self.changes = 0
+
+    @property
+    def level(self):
+        return QualityLevel(self.resolutions[self.resolution_index], *self.rates[self.rate_index])
+
+    def observe(self, elapsed):
+        """Só atualiza a média móvel (modo manual)."""
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += self.alpha * (elapsed - self.latency)
+
+    def record(self, elapsed, now=None):
+        """Registra o tempo de um quadro. Retorna True se o nível mudou."""
+        changed = self.record_latency(elapsed)
+        return self.record_load(elapsed, now) or changed
+
+    def record_latency(self, elapsed):
+        self.observe(elapsed)
+
+        if self.latency > self.budget:
+            self.over += 1
+            self.under = 0
+        elif self.latency < self.headroom * self.budget:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.patience and self.resolution_index < len(self.resolutions) - 1:
+            return self.step_resolution(1)
+        if self.under >= 3 * self.patience and self.resolution_index > 0:
+            return self.step_resolution(-1)
+        return False
+
+    def record_load(self, elapsed, now=None):
+        now = time.perf_counter() if now is None else now
+        if self.window_start is None:
+            self.window_start = now - elapsed
+        self.busy += elapsed
+        duration = now - self.window_start
+        if duration < self.load_window:
+            return False
+        self.load = self.busy / duration
+        self.busy = 0.0
+        self.window_start = now
+
+        if self.load > self.max_load:
+            self.load_over += 1
+            self.load_under = 0
+        elif self.rate_index > 0 and self.projected_load(-1) < self.headroom * self.max_load:
+            self.load_under += 1
+            self.load_over = 0
+        else:
+            self.load_over = self.load_under = 0
+
+        if self.load_over >= self.load_patience and self.rate_index < len(self.rates) - 1:
+            return self.step_rate(1)
+        if self.load_under >= 3 * self.load_patience:
+            return self.step_rate(-1)
+        return False
+
+    def projected_load(self, direction):
+        current = self.rates[self.rate_index]
+        other = self.rates[self.rate_index + direction]
+        return self.load * frames_per_second(other) / frames_per_second(current)
+
+    def step_resolution(self, direction):
+        self.resolution_index += direction
+        self.over = self.under = 0
+        self.changes += 1
+        return True
+
+    def step_rate(self, direction):
+        self.rate_index += direction
+        self.load_over = self.load_under = 0
+        self.changes += 1
+        return True
+
+    def summary(self):
+        latency = 1000.0 * self.latency if self.latency is not None else 0.0
+        load = 100.0 * self.load if self.load is not None else 0.0
+        level = self.level
+        return (f"Qualidade automática: {level.resolution}p, pular {level.skip_frames}, "
+                f"{level.frame_rate} FPS | latência {latency:.1f} ms (orçamento "
+                f"{1000.0 * self.budget:.0f} ms), carga {load:.0f}%, {self.changes} ajustes")
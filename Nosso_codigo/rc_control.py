@@ -0,0 +1,116 @@
+"""Controle contínuo do drone por velocidades (``rc``).
+
+Em vez de comandos de movimento com resposta (``up 20``, ``cw 90``), que levam
+segundos, o RcStreamer manda ``send_rc_control`` numa taxa fixa com a última
+velocidade pedida. O drone reage no próximo pacote, ou seja, em no máximo um
+período. Se ninguém atualizar a velocidade dentro do tempo do watchdog (mão
+perdida, percepção travada), a velocidade volta a zero sozinha.
+
+Para não encher o link Wi-Fi, um pacote igual ao anterior só é repetido como
+keep-alive, a cada ``keepalive`` segundos; os outros são suprimidos e
+contados. ``on_send`` recebe cada pacote enviado (por exemplo o
+``FlightLog.log_rc``).
+"""
+
+import threading
+import time
+
+ZERO = (0, 0, 0, 0)
+
+
+def clamp(value, limit=100):
+    return int(max(-limit, min(limit, value)))
+
+
+def axis(offset, deadzone):
+    """Deslocamento em [-1, 1] -> velocidade relativa em [-1, 1], com zona morta."""
+    magnitude = abs(offset)
+    if magnitude <= deadzone:
+        return 0.0
+    magnitude = min(1.0, (magnitude - deadzone) / (1.0 - deadzone))
+    return magnitude if offset > 0 else -magnitude
+
+
+def hand_velocity(x, y, deadzone=0.15, speed=50):
+    """Posição normalizada da mão no quadro -> velocidades (esquerda/direita,
+    sobe/desce). O centro do quadro é parado; a borda é ``speed``."""
+    lr = axis(2 * x - 1, deadzone)
+    ud = axis(1 - 2 * y, deadzone)
+    return clamp(lr * speed), clamp(ud * speed)
+
+
+class RcStreamer:
+    def __init__(self, drone, rate=20, watchdog=0.3, keepalive=1.0, on_send=None):
+        self.drone = drone
+        self.on_send = on_send
+        self.period = 1.0 / rate
+        self.watchdog = watchdog
+        self.keepalive = keepalive
+        self.target = ZERO
+        self.updated = 0.0
+        self.last_sent = None
+        self.last_sent_time = 0.0
+
+        self.sent = 0
+        self.suppressed = 0
+        self.keepalives = 0
+        self.watchdog_stops = 0
+        self.stopped = threading.Event()
+        self.worker = None
+
+    def start(self):
+        self.stopped.clear()
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.worker is not None:
+            self.worker.join(timeout=1)
+        self.drone.send_rc_control(*ZERO)
+        if self.on_send is not None:
+            self.on_send(*ZERO)
+
+    def set(self, left_right, forward_backward, up_down, yaw):
+        self.target = (clamp(left_right), clamp(forward_backward), clamp(up_down), clamp(yaw))
+        self.updated = time.time()
+
+    def zero(self):
+        self.set(*ZERO)
+
+    def run(self):
+        next_time = time.perf_counter()
+        while not self.stopped.is_set():
+            now = time.time()
+            target = self.target
+            if target != ZERO and now - self.updated > self.watchdog:
+                target = self.target = ZERO
+                self.watchdog_stops += 1
+
+            if target != self.last_sent:
+                self.send(target, now)
+            elif now - self.last_sent_time >= self.keepalive:
+                self.keepalives += 1
+                self.send(target, now)
+            else:
+                self.suppressed += 1
+
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay < 0:
+                next_time = time.perf_counter()
+            else:
+                self.stopped.wait(delay)
+
+    def send(self, target, now):
+        self.drone.send_rc_control(*target)
+        if self.on_send is not None:
+            self.on_send(*target)
+        self.last_sent = target
+        self.last_sent_time = now
+        self.sent += 1
+
+    def summary(self):
+        return (f"rc: {self.sent} pacotes enviados ({self.keepalives} keep-alive), "
+                f"{self.suppressed} repetidos suprimidos, {self.watchdog_stops} paradas pelo watchdog")
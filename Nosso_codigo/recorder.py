@@ -0,0 +1,133 @@
+"""Gravação de vídeo em segundo plano.
+
+O laço principal só copia o quadro para um slot livre de uma fila limitada
+(buffers pré-alocados, sem alocação por quadro); a codificação com
+``cv2.VideoWriter`` roda numa thread própria (o OpenCV solta o GIL enquanto
+codifica). Quando a fila enche, a política decide o que perder:
+
+- ``drop_newest``: descarta o quadro que está chegando;
+- ``drop_oldest``: descarta o quadro mais antigo da fila e guarda o novo;
+- ``block``: espera um slot por até ``block_timeout`` segundos e então
+  descarta o novo.
+
+Os quadros descartados são contados e aparecem no summary().
+"""
+
+import collections
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DROP_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+def recording_path(prefix, suffix):
+    return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{suffix}.mp4"
+
+
+class VideoRecorder:
+    def __init__(self, path, fps=30, fourcc="mp4v", maxsize=32, policy="drop_oldest", block_timeout=0.01):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Política desconhecida: {policy} (opções: {', '.join(DROP_POLICIES)})")
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.policy = policy
+        self.block_timeout = block_timeout
+
+        self.buffers = [None] * maxsize
+        self.free = list(range(maxsize))
+        self.queue = collections.deque()  # índices dos slots, do mais antigo ao mais novo
+        self.condition = threading.Condition()
+        self.writer = None
+        self.size = None
+
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.stopped = True
+        self.worker = None
+
+    def start(self):
+        self.stopped = False
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Para depois de gravar o que já está na fila."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join(timeout)
+
+    def take_slot(self):
+        if self.free:
+            return self.free.pop()
+        if self.policy == "drop_oldest" and self.queue:
+            self.dropped += 1
+            return self.queue.popleft()
+        if self.policy == "block" and self.condition.wait_for(lambda: self.free, self.block_timeout):
+            return self.free.pop()
+        return None
+
+    def write(self, frame):
+        """Coloca uma cópia do quadro na fila. Retorna False se ele foi descartado."""
+        if self.stopped:
+            return False
+        with self.condition:
+            self.received += 1
+            slot = self.take_slot()
+            if slot is None:
+                self.dropped += 1
+                return False
+
+        buffer = self.buffers[slot]
+        if buffer is None or buffer.shape != frame.shape:
+            buffer = self.buffers[slot] = np.empty_like(frame)
+        np.copyto(buffer, frame)
+
+        with self.condition:
+            self.queue.append(slot)
+            self.condition.notify_all()
+        return True
+
+    def open(self, frame):
+        h, w = frame.shape[:2]
+        self.size = (w, h)
+        self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, self.size)
+        if not self.writer.isOpened():
+            raise Exception(f"Não foi possível abrir {self.path} para gravação")
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.queue or self.stopped)
+                    if not self.queue:
+                        break
+                    slot = self.queue.popleft()
+
+                frame = self.buffers[slot]
+                if self.writer is None:
+                    self.open(frame)
+                # A resolução pode mudar no meio do voo; o arquivo mantém a primeira
+                if (frame.shape[1], frame.shape[0]) != self.size:
+                    frame = cv2.resize(frame, self.size)
+                self.writer.write(frame)
+                self.written += 1
+
+                with self.condition:
+                    self.free.append(slot)
+                    self.condition.notify_all()
+        finally:
+            if self.writer is not None:
+                self.writer.release()
+
+    def summary(self):
+        rate = 100.0 * self.dropped / self.received if self.received else 0.0
+        return (f"Gravação {self.path}: {self.written} quadros gravados, "
+                f"{self.dropped} descartados ({rate:.1f}%)")
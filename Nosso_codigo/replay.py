@@ -0,0 +1,340 @@
+"""Replay de um voo gravado, mais rápido que o tempo real.
+
+Passa um vídeo gravado (por exemplo o ``_bruto.mp4`` do RECORD_VIDEO) pelo
+mesmo código de percepção e decisão do TDP_tello.py ou do GestureControl da
+missao4-v3, com um drone falso que responde na hora. Nada espera o stream:
+cada quadro do arquivo é lido e processado o mais rápido que a CPU permitir,
+sem pular nenhum. Depois de cada quadro o replay espera o despachante esvaziar,
+então a sequência de comandos só depende do vídeo e dos parâmetros, não da
+velocidade da máquina. As esperas dos comandos (o ``delay=5`` antes de decolar
+de novo no "land and takeoff") são puladas. Duas execuções podem ser comparadas com ``--baseline``.
+
+    python Nosso_codigo/replay.py --video voo_bruto.mp4 --pipeline tdp --json antes.json
+    python Nosso_codigo/replay.py --video voo_bruto.mp4 --pipeline tdp --spread 0.15 --baseline antes.json
+
+Com ``--telemetry voo.fdr`` (registro de voo do mesmo voo), a telemetria vem do
+registro: o i-ésimo quadro do vídeo usa a do i-ésimo quadro registrado.
+
+Com ``--cache landmarks.db``, os landmarks de cada quadro ficam num cache em
+disco (landmark_cache.py) e as execuções seguintes sobre o mesmo vídeo pulam o
+MediaPipe; sobra decodificar o vídeo e rodar as regras.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from benchmark import PIPELINES, BenchGui, load_module
+from capture import FramePacket
+from dispatcher import CommandDispatcher
+from flight_log import FRAME, FlightLog, load_flight_log, log_path
+from gesture_classifier import GESTURES
+from gesture_filter import HandFilters
+from landmark_cache import CachedHands, LandmarkCache, clip_id
+from perf import StageTimer, TimedProxy
+from rc_control import clamp
+from telemetry import STATE_FIELDS, Telemetry
+from tello_sim import FileFrameRead, StubTello
+
+REPLAY_PIPELINES = ("tdp", "missao4-v3")
+
+
+class ReplayCapture:
+    """Lê o vídeo um quadro por vez, só quando o replay chama advance().
+    Tem o poll()/read()/frame da CaptureThread, então os scripts a usam no
+    lugar da captura em thread. O instante de cada quadro é o do vídeo."""
+
+    def __init__(self, path):
+        self.frame_read = FileFrameRead(path, loop=False)
+        self.fps = self.frame_read.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.seq = -1
+        self.timestamp = 0.0
+        self.current = None
+
+    def start(self):
+        return self
+
+    def stop(self):
+        self.frame_read.stop()
+
+    @property
+    def stopped(self):
+        return self.frame_read.stopped
+
+    def advance(self):
+        frame = self.frame_read.read_next()
+        if frame is None:
+            return None
+        self.seq += 1
+        self.timestamp = self.seq / self.fps
+        self.current = frame
+        return FramePacket(self.seq, self.timestamp, frame)
+
+    def poll(self, last_seq=-1):
+        if self.current is None or self.seq <= last_seq:
+            return None
+        return FramePacket(self.seq, self.timestamp, self.current)
+
+    def read(self, last_seq=-1, timeout=None):
+        return self.poll(last_seq)
+
+    def release(self):
+        pass
+
+    @property
+    def frame(self):
+        return self.current
+
+
+class ReplayTello(StubTello):
+    """StubTello que responde na hora e anota cada comando com o seq do
+    quadro em que foi enviado."""
+
+    def __init__(self, capture):
+        super().__init__(takeoff_time=0.0)
+        self.capture = capture
+        self.sent = []  # (seq, comando, resposta)
+
+    def send_command_with_return(self, command, timeout=StubTello.RESPONSE_TIMEOUT):
+        response, _ = self.simulator.handle_command(command)
+        self.sent.append((self.capture.seq, command, response))
+        return response
+
+    def send_command_without_return(self, command):
+        if command.startswith("rc "):
+            self.simulator.handle_rc(command)
+        else:
+            self.simulator.handle_command(command)
+        self.sent.append((self.capture.seq, command, None))
+
+    def send_rc_control(self, left_right_velocity, forward_backward_velocity,
+                        up_down_velocity, yaw_velocity):
+        # Sem o limite de taxa por relógio do djitellopy: o replay não anda em tempo real
+        self.send_command_without_return(
+            f"rc {clamp(left_right_velocity)} {clamp(forward_backward_velocity)} "
+            f"{clamp(up_down_velocity)} {clamp(yaw_velocity)}")
+
+    def get_frame_read(self):
+        return self.capture
+
+
+class ReplayTelemetry:
+    """``latest`` como no TelemetryCache, mas no tempo do replay: a telemetria
+    gravada num registro de voo ou, sem registro, a do drone simulado."""
+
+    def __init__(self, capture, drone, path=None):
+        self.capture = capture
+        self.drone = drone
+        self.recorded = None
+        if path is not None:
+            _, records = load_flight_log(path)
+            self.recorded = np.asarray(records["telemetry"][records["kind"] == FRAME])
+
+    @property
+    def latest(self):
+        if self.recorded is None or len(self.recorded) == 0:
+            state = self.drone.get_current_state()
+            return Telemetry(self.capture.timestamp, *(state.get(key) for key in STATE_FIELDS.values()))
+        values = self.recorded[min(max(self.capture.seq, 0), len(self.recorded) - 1)]
+        return Telemetry(self.capture.timestamp, *(None if np.isnan(value) else float(value)
+                                                   for value in values.tolist()))
+
+
+def gui_for(args):
+    options = dict(workers=0, roi=args.roi, record=False, auto_quality=False, budget=50, rc=False,
+                   resolution=args.resolution)
+    gui = BenchGui(argparse.Namespace(**options))
+    # Sem limite de taxa: o GestureControl processa cada quadro assim que chega
+    gui.frame_rate.set(float("inf"))
+    gui.gesture_window.set(args.window)
+    gui.gesture_votes.set(args.votes)
+    gui.move_distance.set(args.move_distance)
+    return gui
+
+
+def setup_tdp(tdp, args, drone, dispatcher, telemetry, flight_log, wrap_hands):
+    tdp.create_perception()
+    tdp.tello = drone
+    tdp.dispatcher = dispatcher
+    tdp.telemetry = telemetry
+    tdp.flight_log = flight_log
+    tdp.classifier.spread = args.spread
+    tdp.gesture_filters = HandFilters(window=args.window, votes=args.votes)
+    tdp.hands = wrap_hands(tdp.hands, f"tdp {sorted(tdp.HANDS_OPTIONS.items())}")
+    tdp.ROI_TRACKING = args.roi
+    tdp.roi_tracker.hands = tdp.hands
+    return lambda packet: tdp.process_frame(packet.frame, packet.seq), None
+
+
+def setup_mission(mission, args, drone, dispatcher, telemetry, flight_log, wrap_hands):
+    gui = gui_for(args)
+    gesture_control = mission.GestureControl(gui=gui)
+    gesture_control.setup(drone=drone, dispatcher=dispatcher, flight_log=flight_log)
+    # Troca a captura em thread pela do replay, que só avança quando pedido
+    gesture_control.capture.stop()
+    gesture_control.capture = drone.get_frame_read()
+    gesture_control.hands = wrap_hands(gesture_control.hands,
+                                       f"missao4-v3 confiança {gui.detection_confidence.get()}")
+    if gesture_control.roi_tracker is not None:
+        gesture_control.roi_tracker.hands = gesture_control.hands
+    return lambda packet: gesture_control.update(), lambda: gesture_control.terminate(None)
+
+
+def replay(args):
+    capture = ReplayCapture(args.video)
+    drone = ReplayTello(capture)
+    drone.connect()
+    drone.takeoff()
+    telemetry = ReplayTelemetry(capture, drone, args.telemetry)
+    timer = StageTimer()
+
+    module = load_module(PIPELINES[args.pipeline], args.pipeline)
+    flight_log = on_response = None
+    if args.flight_log:
+        labels = GESTURES if args.pipeline == "tdp" else [zone or "none" for zone in module.ZONES]
+        flight_log = FlightLog(log_path(f"replay_{args.pipeline}"), labels, telemetry).open()
+        on_response = flight_log.log_command
+    dispatcher = CommandDispatcher(drone, on_response=on_response, honour_delays=False).start()
+
+    cache = None
+    if args.cache:
+        cache = LandmarkCache(args.cache, max_bytes=args.cache_size << 20)
+        clip = clip_id(args.video)
+
+    def wrap_hands(hands, options):
+        # Cache antes do MediaPipe; o tempo medido em hands.process já inclui a consulta
+        if cache is not None:
+            hands = CachedHands(hands, cache, f"mediapipe {mp.__version__} {options}",
+                                frame_key=lambda: (clip, capture.seq))
+        return TimedProxy(hands, timer, {"process": "hands.process"})
+
+    setup = setup_tdp if args.pipeline == "tdp" else setup_mission
+    step, terminate = setup(module, args, drone, dispatcher, telemetry, flight_log, wrap_hands)
+    del drone.sent[:]
+
+    start = time.perf_counter()
+    while not args.frames or timer.frames < args.frames:
+        packet = capture.advance()
+        if packet is None:
+            break
+        with timer.stage("total"):
+            step(packet)
+        # O drone falso responde na hora; o próximo quadro vê o despachante vazio
+        dispatcher.wait_idle()
+        timer.frame()
+    elapsed = time.perf_counter() - start
+
+    commands = list(drone.sent)
+    if terminate is not None:
+        terminate()
+    dispatcher.stop()
+    capture.stop()
+    if flight_log is not None:
+        flight_log.close()
+    if cache is not None:
+        cache.close()
+
+    with timer.lock:
+        frame_ms = [1000.0 * value for value in timer.samples.get("total", [])]
+    return {
+        "pipeline": args.pipeline,
+        "video": args.video,
+        "frames": timer.frames,
+        "fps": timer.frames / elapsed if elapsed else 0.0,
+        "video_fps": capture.fps,
+        "stages": timer.summary(),
+        "frame_ms": frame_ms,
+        "commands": commands,
+        "flight_log": flight_log.path if flight_log is not None else None,
+        "cache": cache.summary() if cache is not None else None,
+    }, timer
+
+
+def report(result, timer):
+    speed = result["fps"] / result["video_fps"] if result["video_fps"] else 0.0
+    lines = [timer.report(f"replay {result['pipeline']}"),
+             f"{result['fps']:.1f} quadros/s ({speed:.1f}x o tempo real do vídeo)",
+             f"== {len(result['commands'])} comandos"]
+    for seq, command, response in result["commands"]:
+        lines.append(f"{seq:>7}  {command:<16} {response if response is not None else '-'}")
+    if result["cache"]:
+        lines.append(result["cache"])
+    if result["flight_log"]:
+        lines.append(f"Registro de voo: {result['flight_log']}")
+    return "\n".join(lines)
+
+
+def compare(result, baseline):
+    lines = ["== comparação com a linha de base"]
+    lines.append(f"quadros/s {baseline['fps']:.1f} -> {result['fps']:.1f}")
+    for stage, stats in result["stages"].items():
+        before = baseline["stages"].get(stage)
+        if before is not None:
+            lines.append(f"  {stage:<16} p50 {before['p50']:.2f} -> {stats['p50']:.2f} ms"
+                         f" | p95 {before['p95']:.2f} -> {stats['p95']:.2f} ms")
+
+    old = [tuple(command) for command in baseline["commands"]]
+    new = [tuple(command) for command in result["commands"]]
+    if old == new:
+        lines.append(f"Comandos iguais ({len(new)})")
+        return "\n".join(lines)
+
+    lines.append(f"Comandos diferentes: {len(old)} -> {len(new)}")
+    for i, (before, after) in enumerate(zip(old + [None] * len(new), new + [None] * len(old))):
+        if before != after:
+            lines.append(f"  primeira diferença no comando {i}: {before} -> {after}")
+            break
+    counts = {}
+    for sign, commands in ((-1, old), (1, new)):
+        for _, command, _ in commands:
+            counts[command] = counts.get(command, 0) + sign
+    for command, delta in sorted(counts.items()):
+        if delta:
+            lines.append(f"  {command:<16} {delta:+d}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay de um voo gravado, sem esperar o stream")
+    parser.add_argument("--video", required=True, help="vídeo gravado do voo")
+    parser.add_argument("--pipeline", choices=REPLAY_PIPELINES, default="tdp")
+    parser.add_argument("--frames", type=int, default=0, help="quadros a processar (0 = o vídeo todo)")
+    parser.add_argument("--telemetry", help="registro de voo (.fdr) com a telemetria do mesmo voo")
+    parser.add_argument("--resolution", type=int, default=720, help="resolução do GestureControl (missao4-v3)")
+    parser.add_argument("--roi", action="store_true", help="rastreia a mão por região de interesse")
+    parser.add_argument("--spread", type=float, default=0.2, help="limiar do polegar afastado (tdp)")
+    parser.add_argument("--window", type=int, default=5, help="janela do filtro de gestos (quadros)")
+    parser.add_argument("--votes", type=int, default=3, help="votos para aceitar um gesto")
+    parser.add_argument("--move-distance", type=int, default=20, help="distância dos movimentos (missao4-v3)")
+    parser.add_argument("--cache", help="cache em disco dos landmarks (SQLite), reaproveitado entre execuções")
+    parser.add_argument("--cache-size", type=int, default=1024, help="tamanho máximo do cache (MB)")
+    parser.add_argument("--flight-log", action="store_true", help="grava o registro de voo do replay")
+    parser.add_argument("--json", help="salva os comandos e os tempos por quadro em JSON")
+    parser.add_argument("--baseline", help="JSON de um replay anterior para comparar")
+    args = parser.parse_args()
+
+    # Sem janela nem desenhos: o replay mede só percepção e decisão
+    os.environ["TELLO_HEADLESS"] = "1"
+
+    # Os scripts imprimem a cada quadro; a saída do replay é o relatório
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result, timer = replay(args)
+    print(report(result, timer))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print(compare(result, json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
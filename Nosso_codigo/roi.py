@@ -0,0 +1,87 @@
+"""Rastreamento da mão por região de interesse (ROI).
+
+Depois que a mão aparece, ela se move pouco de um quadro para o outro. O
+RoiTracker recorta uma caixa com folga em volta dos landmarks anteriores, roda
+o MediaPipe só no recorte e converte os landmarks de volta para coordenadas do
+quadro inteiro, então o resto do código não percebe a diferença. Se a mão não
+estiver no recorte, o mesmo quadro é procurado inteiro.
+"""
+
+import cv2
+import numpy as np
+
+
+class RoiTracker:
+    def __init__(self, hands, padding=0.3, min_size=160):
+        self.hands = hands
+        self.padding = padding
+        self.min_size = min_size
+        self.box = None  # (x0, y0, x1, y1) em pixels
+
+        self.frames = 0
+        self.roi_frames = 0
+        self.hits = 0
+        self.full_frames = 0
+        self.pixels = 0
+
+    def reset(self):
+        self.box = None
+
+    def detect(self, frame, box=None):
+        if box is not None:
+            x0, y0, x1, y1 = box
+            frame = frame[y0:y1, x0:x1]
+        self.pixels += frame.shape[0] * frame.shape[1]
+        # O MediaPipe precisa de um array contíguo; o recorte é uma view
+        frame_rgb = cv2.cvtColor(np.ascontiguousarray(frame), cv2.COLOR_BGR2RGB)
+        return self.hands.process(frame_rgb)
+
+    def process(self, frame):
+        """Detecta as mãos num quadro BGR. Retorna o mesmo objeto do hands.process(),
+        com os landmarks em coordenadas normalizadas do quadro inteiro."""
+        self.frames += 1
+        h, w = frame.shape[:2]
+
+        if self.box is not None:
+            self.roi_frames += 1
+            results = self.detect(frame, self.box)
+            if results.multi_hand_landmarks:
+                self.hits += 1
+                self.to_frame(results, self.box, w, h)
+                self.box = self.next_box(results, w, h)
+                return results
+            self.box = None
+
+        self.full_frames += 1
+        results = self.detect(frame)
+        if results.multi_hand_landmarks:
+            self.box = self.next_box(results, w, h)
+        return results
+
+    def to_frame(self, results, box, w, h):
+        x0, y0, x1, y1 = box
+        scale_x, scale_y = (x1 - x0) / w, (y1 - y0) / h
+        for hand_landmarks in results.multi_hand_landmarks:
+            for landmark in hand_landmarks.landmark:
+                landmark.x = x0 / w + landmark.x * scale_x
+                landmark.y = y0 / h + landmark.y * scale_y
+                # z usa a mesma escala do x
+                landmark.z = landmark.z * scale_x
+
+    def next_box(self, results, w, h):
+        # Caixa quadrada com folga em volta de todas as mãos
+        points = np.array([(p.x * w, p.y * h) for hand in results.multi_hand_landmarks
+                           for p in hand.landmark], dtype=np.float32)
+        (x_min, y_min), (x_max, y_max) = points.min(axis=0), points.max(axis=0)
+        size = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        size = min(max(size, self.min_size), w, h)
+        cx, cy = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0 = int(np.clip(cx - size / 2, 0, w - size))
+        y0 = int(np.clip(cy - size / 2, 0, h - size))
+        return x0, y0, x0 + int(size), y0 + int(size)
+
+    def summary(self):
+        hit_rate = 100.0 * self.hits / self.roi_frames if self.roi_frames else 0.0
+        pixels = self.pixels / self.frames if self.frames else 0.0
+        return (f"ROI: {self.hits}/{self.roi_frames} acertos ({hit_rate:.1f}%), "
+                f"{self.full_frames} buscas no quadro inteiro, {pixels:.0f} pixels por quadro")
@@ -0,0 +1,74 @@
+"""Cache da telemetria do drone, alimentado pelo stream de estado.
+
+O djitellopy já recebe os pacotes de estado (porta 8890) numa thread própria e
+troca o dicionário de estado a cada pacote. O TelemetryCache acompanha essa
+troca numa thread de fundo e publica um snapshot imutável com o instante de
+chegada. A publicação é uma simples troca de referência, então ler
+``telemetry.latest`` nunca bloqueia nem espera o drone.
+"""
+
+import collections
+import threading
+import time
+
+# Campo do snapshot -> campo do pacote de estado do Tello
+STATE_FIELDS = {
+    "battery": "bat",
+    "height": "h",
+    "tof": "tof",
+    "pitch": "pitch",
+    "roll": "roll",
+    "yaw": "yaw",
+    "vgx": "vgx",
+    "vgy": "vgy",
+    "vgz": "vgz",
+    "templ": "templ",
+    "temph": "temph",
+    "baro": "baro",
+    "flight_time": "time",
+}
+
+Telemetry = collections.namedtuple("Telemetry", ["timestamp"] + list(STATE_FIELDS))
+
+# Snapshot antes do primeiro pacote: campos desconhecidos ficam None
+EMPTY_TELEMETRY = Telemetry(0.0, *[None] * len(STATE_FIELDS))
+
+
+class TelemetryCache:
+    def __init__(self, drone, rate=50.0):
+        self.drone = drone
+        self.period = 1.0 / rate
+        self.latest = EMPTY_TELEMETRY
+        self.packets = 0
+        self.stopped = True
+        self.worker = None
+
+    def start(self):
+        self.stopped = False
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+        return self
+
+    def stop(self):
+        self.stopped = True
+        if self.worker is not None:
+            self.worker.join(timeout=1)
+
+    def run(self):
+        last = None
+        while not self.stopped:
+            state = self.drone.get_current_state()
+            if state and state is not last:
+                last = state
+                self.latest = Telemetry(time.time(), *(state.get(key) for key in STATE_FIELDS.values()))
+                self.packets += 1
+            time.sleep(self.period)
+
+    @property
+    def age(self):
+        """Segundos desde o último pacote de estado (infinito se nenhum chegou)."""
+        timestamp = self.latest.timestamp
+        return time.time() - timestamp if timestamp else float("inf")
+
+    def summary(self):
+        return f"Telemetria: {self.packets} pacotes, último há {self.age:.2f} s"
@@ -0,0 +1,645 @@
+"""Simulador local do Tello para testes de carga e latência sem o drone.
+
+O simulador responde aos comandos do SDK na porta de comando (``command``,
+``takeoff``, ``up 20``, ``rc a b c d``, ``battery?``...), com latência e perda
+configuráveis, transmite pacotes de estado como o drone real e envia um
+arquivo de vídeo (MP4/H.264) como stream de vídeo via ffmpeg.
+
+Subir o simulador:
+    python Nosso_codigo/tello_sim.py --video voo.mp4 --latency 0.05 --loss 0.01
+
+Apontar os scripts para ele (qualquer valor de TELLO_SIM é o IP do simulador):
+    TELLO_SIM=127.0.0.1 python TDP_tello.py
+
+O djitellopy real usa sempre as portas locais 8889/8890/11111, então para usar
+o ``Tello`` original com o simulador ele precisa rodar em outra máquina ou
+container (``Tello(host=ip_do_simulador)``). Na mesma máquina os scripts usam
+o ``SimTello``, que fala o mesmo protocolo a partir de uma porta efêmera.
+"""
+
+import argparse
+import os
+import queue
+import random
+import shutil
+import socket
+import subprocess
+import threading
+import time
+
+import cv2
+from djitellopy import Tello
+from djitellopy.tello import BackgroundFrameRead
+
+COMMAND_PORT = 8889
+STATE_PORT = 8890
+VIDEO_PORT = 11111
+
+# Comandos de movimento aceitos pelo simulador e a velocidade usada para
+# estimar quanto tempo o drone "demora" para executá-los
+MOVE_COMMANDS = ("up", "down", "left", "right", "forward", "back")
+ROTATE_COMMANDS = ("cw", "ccw")
+OK_COMMANDS = ("command", "emergency", "keepalive", "motoron", "motoroff",
+               "speed", "setfps", "setresolution", "setbitrate", "downvision",
+               "wifi", "ap", "mon", "moff", "flip", "go", "stop")
+
+
+class TelloSimulator:
+    def __init__(self, video_path=None, host="0.0.0.0", command_port=COMMAND_PORT,
+                 state_port=STATE_PORT, video_port=VIDEO_PORT, latency=0.0,
+                 jitter=0.0, loss=0.0, state_rate=10.0, move_speed=100.0,
+                 takeoff_time=1.0, seed=None):
+        self.video_path = video_path
+        self.address = (host, command_port)
+        self.state_port = state_port
+        self.video_port = video_port
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.state_rate = state_rate
+        self.move_speed = move_speed
+        self.takeoff_time = takeoff_time
+        self.random = random.Random(seed)
+
+        self.socket = None
+        self.client = None
+        self.commands = queue.Queue()
+        self.running = False
+        self.threads = []
+        self.video_process = None
+        self.lock = threading.Lock()
+
+        # Estado simulado do drone
+        self.start_time = time.time()
+        self.battery = 100.0
+        self.height = 0
+        self.yaw = 0
+        self.flying = False
+        self.rc = (0, 0, 0, 0)
+        self.received = 0
+        self.dropped = 0
+
+    def start(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(self.address)
+        self.running = True
+        for target in (self.receive_loop, self.command_loop, self.state_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"Simulador do Tello ouvindo em {self.address[0]}:{self.address[1]}")
+        return self
+
+    def stop(self):
+        self.running = False
+        self.stop_video()
+        self.commands.put(None)
+        if self.socket is not None:
+            self.socket.close()
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def receive_loop(self):
+        while self.running:
+            try:
+                data, address = self.socket.recvfrom(1024)
+            except OSError:
+                break
+
+            command = data.decode("utf-8", errors="replace").strip()
+            self.received += 1
+            self.client = address
+
+            # Comandos rc não têm resposta e não entram na fila do drone
+            if command.startswith("rc "):
+                self.handle_rc(command)
+                continue
+
+            self.commands.put((command, address))
+
+    def command_loop(self):
+        # O Tello executa um comando por vez, então a fila é sequencial
+        while self.running:
+            item = self.commands.get()
+            if item is None:
+                break
+            command, address = item
+
+            if self.loss and self.random.random() < self.loss:
+                self.dropped += 1
+                continue
+
+            response, duration = self.handle_command(command)
+            delay = self.latency + duration
+            if self.jitter:
+                delay += self.random.uniform(0, self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+
+            try:
+                self.socket.sendto(response.encode("utf-8"), address)
+            except OSError:
+                break
+
+    def handle_rc(self, command):
+        try:
+            values = tuple(int(v) for v in command.split()[1:5])
+        except ValueError:
+            return
+        if len(values) == 4:
+            self.rc = tuple(max(-100, min(100, v)) for v in values)
+
+    def handle_command(self, command):
+        """Aplica o comando ao estado simulado e retorna (resposta, duração)."""
+        parts = command.split()
+        if not parts:
+            return "error", 0.0
+        name, args = parts[0], parts[1:]
+
+        with self.lock:
+            if name.endswith("?"):
+                return self.handle_query(name), 0.0
+
+            if name == "takeoff":
+                if self.battery < 10:
+                    return "error No valid imu", 0.0
+                self.flying = True
+                self.height = 80
+                return "ok", self.takeoff_time
+
+            if name == "land":
+                self.flying = False
+                self.height = 0
+                self.rc = (0, 0, 0, 0)
+                return "ok", self.takeoff_time
+
+            if name in ("streamon", "streamoff"):
+                if name == "streamon":
+                    self.start_video()
+                else:
+                    self.stop_video()
+                return "ok", 0.0
+
+            if name in MOVE_COMMANDS or name in ROTATE_COMMANDS:
+                if not self.flying:
+                    return "error Not joystick", 0.0
+                try:
+                    value = int(args[0])
+                except (IndexError, ValueError):
+                    return "error", 0.0
+
+                if name == "up":
+                    self.height += value
+                elif name == "down":
+                    self.height = max(0, self.height - value)
+                elif name == "cw":
+                    self.yaw = (self.yaw + value + 180) % 360 - 180
+                elif name == "ccw":
+                    self.yaw = (self.yaw - value + 180) % 360 - 180
+
+                if name in ROTATE_COMMANDS:
+                    return "ok", value / 90.0
+                return "ok", value / self.move_speed
+
+            if name in OK_COMMANDS:
+                return "ok", 0.0
+
+        return f"unknown command: {name}", 0.0
+
+    def handle_query(self, name):
+        if name == "battery?":
+            return str(int(self.battery))
+        if name == "height?":
+            return f"{self.height // 10}dm"
+        if name == "speed?":
+            return f"{self.move_speed:.1f}"
+        if name == "time?":
+            return f"{int(time.time() - self.start_time)}s"
+        if name == "temp?":
+            return "60~62C"
+        if name == "tof?":
+            return f"{self.height * 10 + 100}mm"
+        if name == "attitude?":
+            return f"pitch:0;roll:0;yaw:{self.yaw};"
+        if name == "wifi?":
+            return "90"
+        if name == "sdk?":
+            return "20"
+        if name == "sn?":
+            return "0TQZSIMULADOR"
+        return f"unknown command: {name}"
+
+    def state_packet(self):
+        with self.lock:
+            vx, vy, vz, vyaw = self.rc if self.flying else (0, 0, 0, 0)
+            elapsed = int(time.time() - self.start_time)
+            return (
+                f"mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:{self.yaw};"
+                f"vgx:{vx};vgy:{vy};vgz:{vz};templ:60;temph:62;"
+                f"tof:{self.height + 10};h:{self.height};bat:{int(self.battery)};"
+                f"baro:{self.height / 100:.2f};time:{elapsed if self.flying else 0};"
+                f"agx:0.00;agy:0.00;agz:-1000.00;\r\n"
+            )
+
+    def state_loop(self):
+        state_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        period = 1.0 / self.state_rate
+        last = time.time()
+        while self.running:
+            time.sleep(period)
+            now = time.time()
+            self.integrate(now - last)
+            last = now
+
+            if self.client is None:
+                continue
+            try:
+                state_socket.sendto(self.state_packet().encode("ascii"),
+                                    (self.client[0], self.state_port))
+            except OSError:
+                pass
+        state_socket.close()
+
+    def integrate(self, dt):
+        # Integra as velocidades de rc (cm/s e graus/s aproximados) e drena a bateria
+        with self.lock:
+            if not self.flying:
+                return
+            _, _, vz, vyaw = self.rc
+            self.height = max(0, int(self.height + vz * dt))
+            self.yaw = int((self.yaw + vyaw * dt + 180) % 360 - 180)
+            self.battery = max(0.0, self.battery - dt / 6.0)
+
+    def start_video(self):
+        if self.video_process is not None or self.video_path is None or self.client is None:
+            return
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            print("ffmpeg não encontrado, o simulador não vai transmitir vídeo")
+            return
+
+        # -re mantém a taxa de quadros do arquivo, como o stream real do drone
+        url = f"udp://{self.client[0]}:{self.video_port}?pkt_size=1460"
+        self.video_process = subprocess.Popen(
+            [ffmpeg, "-loglevel", "error", "-re", "-stream_loop", "-1",
+             "-i", self.video_path, "-an", "-c:v", "libx264", "-preset", "ultrafast",
+             "-tune", "zerolatency", "-g", "30", "-f", "h264", url],
+            stdin=subprocess.DEVNULL,
+        )
+
+    def stop_video(self):
+        if self.video_process is None:
+            return
+        self.video_process.terminate()
+        try:
+            self.video_process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.video_process.kill()
+        self.video_process = None
+
+
+class SimTello:
+    """Cliente com a mesma interface do djitellopy.Tello usada nos scripts,
+    mas que fala com o simulador a partir de uma porta UDP efêmera."""
+
+    RESPONSE_TIMEOUT = Tello.RESPONSE_TIMEOUT
+    RETRY_COUNT = Tello.RETRY_COUNT
+    TIME_BTW_COMMANDS = Tello.TIME_BTW_COMMANDS
+    TIME_BTW_RC_CONTROL_COMMANDS = Tello.TIME_BTW_RC_CONTROL_COMMANDS
+
+    def __init__(self, host="127.0.0.1", command_port=COMMAND_PORT,
+                 state_port=STATE_PORT, video_port=VIDEO_PORT, retry_count=RETRY_COUNT):
+        self.address = (host, command_port)
+        self.video_port = video_port
+        self.retry_count = retry_count
+        self.stream_on = False
+        self.is_flying = False
+        self.cap = None
+        self.background_frame_read = None
+        self.last_received_command_timestamp = time.time()
+        self.last_rc_control_timestamp = time.time()
+
+        self.responses = queue.Queue()
+        self.state = {}
+
+        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.client_socket.bind(("", 0))
+        self.state_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.state_socket.bind(("", state_port))
+
+        threading.Thread(target=self.response_receiver, daemon=True).start()
+        threading.Thread(target=self.state_receiver, daemon=True).start()
+
+    def response_receiver(self):
+        while True:
+            try:
+                data, _ = self.client_socket.recvfrom(1024)
+            except OSError:
+                break
+            self.responses.put(data)
+
+    def state_receiver(self):
+        while True:
+            try:
+                data, _ = self.state_socket.recvfrom(1024)
+            except OSError:
+                break
+            self.state = Tello.parse_state(data.decode("ascii", errors="replace"))
+
+    def send_command_with_return(self, command, timeout=RESPONSE_TIMEOUT):
+        diff = time.time() - self.last_received_command_timestamp
+        if diff < self.TIME_BTW_COMMANDS:
+            time.sleep(diff)
+
+        # Descarta respostas atrasadas de comandos anteriores
+        while not self.responses.empty():
+            self.responses.get_nowait()
+
+        self.client_socket.sendto(command.encode("utf-8"), self.address)
+        try:
+            data = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            return f"Aborting command '{command}'. Did not receive a response after {timeout} seconds"
+
+        self.last_received_command_timestamp = time.time()
+        return data.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def send_command_without_return(self, command):
+        self.client_socket.sendto(command.encode("utf-8"), self.address)
+
+    def send_control_command(self, command, timeout=RESPONSE_TIMEOUT):
+        response = "max retries exceeded"
+        for _ in range(self.retry_count):
+            response = self.send_command_with_return(command, timeout=timeout)
+            if "ok" in response.lower():
+                return True
+        raise Exception(f"Command '{command}' was unsuccessful for {1 + self.retry_count} tries. "
+                        f"Latest response:\t'{response}'")
+
+    def send_read_command(self, command):
+        response = self.send_command_with_return(command)
+        if any(word in response for word in ("error", "ERROR", "False")):
+            raise Exception(f"Command '{command}' was unsuccessful. Latest response:\t'{response}'")
+        return response
+
+    def connect(self, wait_for_state=True):
+        self.send_control_command("command")
+        if wait_for_state:
+            for _ in range(20):
+                if self.state:
+                    break
+                time.sleep(0.05)
+            if not self.state:
+                raise Exception("Did not receive a state packet from the Tello")
+
+    def get_current_state(self):
+        return self.state
+
+    def get_state_field(self, key):
+        state = self.state
+        if key in state:
+            return state[key]
+        raise Exception(f"Could not get state property: {key}")
+
+    def get_battery(self):
+        return self.get_state_field("bat")
+
+    def get_height(self):
+        return self.get_state_field("h")
+
+    def get_yaw(self):
+        return self.get_state_field("yaw")
+
+    def get_distance_tof(self):
+        return self.get_state_field("tof")
+
+    def get_udp_video_address(self):
+        return f"udp://@0.0.0.0:{self.video_port}"
+
+    def get_frame_read(self):
+        if self.background_frame_read is None:
+            self.background_frame_read = BackgroundFrameRead(self, self.get_udp_video_address())
+            self.background_frame_read.start()
+        return self.background_frame_read
+
+    def streamon(self):
+        self.send_control_command("streamon")
+        self.stream_on = True
+
+    def streamoff(self):
+        self.send_control_command("streamoff")
+        self.stream_on = False
+
+    def takeoff(self):
+        self.send_control_command("takeoff", timeout=Tello.TAKEOFF_TIMEOUT)
+        self.is_flying = True
+
+    def land(self):
+        self.send_control_command("land")
+        self.is_flying = False
+
+    def move(self, direction, x):
+        self.send_control_command(f"{direction} {x}")
+
+    def move_up(self, x):
+        self.move("up", x)
+
+    def move_down(self, x):
+        self.move("down", x)
+
+    def move_left(self, x):
+        self.move("left", x)
+
+    def move_right(self, x):
+        self.move("right", x)
+
+    def move_forward(self, x):
+        self.move("forward", x)
+
+    def move_back(self, x):
+        self.move("back", x)
+
+    def rotate_clockwise(self, x):
+        self.send_control_command(f"cw {x}")
+
+    def rotate_counter_clockwise(self, x):
+        self.send_control_command(f"ccw {x}")
+
+    def send_keepalive(self):
+        self.send_control_command("keepalive")
+
+    def send_rc_control(self, left_right_velocity, forward_backward_velocity,
+                        up_down_velocity, yaw_velocity):
+        def clamp100(x):
+            return max(-100, min(100, int(x)))
+
+        if time.time() - self.last_rc_control_timestamp > self.TIME_BTW_RC_CONTROL_COMMANDS:
+            self.last_rc_control_timestamp = time.time()
+            self.send_command_without_return("rc {} {} {} {}".format(
+                clamp100(left_right_velocity), clamp100(forward_backward_velocity),
+                clamp100(up_down_velocity), clamp100(yaw_velocity)))
+
+    def end(self):
+        if self.is_flying:
+            self.land()
+        if self.stream_on:
+            self.streamoff()
+        if self.background_frame_read is not None:
+            self.background_frame_read.stop()
+        if self.cap is not None:
+            self.cap.release()
+        self.client_socket.close()
+        self.state_socket.close()
+
+
+class FileFrameRead:
+    """Substitui o BackgroundFrameRead lendo um arquivo de vídeo. Sem ``fps``,
+    cada acesso a ``frame`` decodifica o próximo quadro, o mais rápido que a CPU
+    permitir; com ``fps``, um quadro novo só aparece a cada 1/fps segundos, como
+    no stream do drone."""
+
+    def __init__(self, path, loop=True, fps=None):
+        self.path = path
+        self.loop = loop
+        self.period = 1.0 / fps if fps else 0.0
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise Exception(f"Não foi possível abrir o vídeo {path}")
+        self.index = -1
+        self.stopped = False
+        self.current = None
+        self.next_time = 0.0
+
+    @property
+    def frame(self):
+        if self.stopped:
+            return None
+        if self.period:
+            now = time.perf_counter()
+            if self.current is not None and now < self.next_time:
+                return self.current
+            self.next_time = max(self.next_time + self.period, now)
+        self.current = self.read_next()
+        return self.current
+
+    def read_next(self):
+        grabbed, frame = self.cap.read()
+        if not grabbed and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            grabbed, frame = self.cap.read()
+        if not grabbed:
+            self.stopped = True
+            return None
+        self.index += 1
+        return frame
+
+    def stop(self):
+        self.stopped = True
+        self.cap.release()
+
+
+class StubTello(SimTello):
+    """Drone falso em processo, sem rede: os comandos passam pela mesma lógica
+    do TelloSimulator, com a latência configurada, e o vídeo vem de um arquivo.
+    Usado nos benchmarks e no replay."""
+
+    def __init__(self, video_path=None, latency=0.0, loop=True, fps=None, **simulator_args):
+        self.simulator = TelloSimulator(latency=latency, **simulator_args)
+        self.video_path = video_path
+        self.loop = loop
+        self.fps = fps
+        self.retry_count = self.RETRY_COUNT
+        self.stream_on = False
+        self.is_flying = False
+        self.cap = None
+        self.background_frame_read = None
+        self.last_rc_control_timestamp = 0.0
+        self.commands = []
+
+    def send_command_with_return(self, command, timeout=SimTello.RESPONSE_TIMEOUT):
+        self.commands.append((time.time(), command))
+        response, duration = self.simulator.handle_command(command)
+        delay = self.simulator.latency + duration
+        if delay > timeout:
+            time.sleep(timeout)
+            return f"Aborting command '{command}'. Did not receive a response after {timeout} seconds"
+        if delay > 0:
+            time.sleep(delay)
+        return response
+
+    def send_command_without_return(self, command):
+        self.commands.append((time.time(), command))
+        if command.startswith("rc "):
+            self.simulator.handle_rc(command)
+        else:
+            self.simulator.handle_command(command)
+
+    def get_current_state(self):
+        return Tello.parse_state(self.simulator.state_packet())
+
+    @property
+    def state(self):
+        return self.get_current_state()
+
+    def get_frame_read(self):
+        if self.background_frame_read is None:
+            if self.video_path is None:
+                raise Exception("StubTello sem arquivo de vídeo")
+            self.background_frame_read = FileFrameRead(self.video_path, loop=self.loop, fps=self.fps)
+        return self.background_frame_read
+
+    def end(self):
+        if self.background_frame_read is not None:
+            self.background_frame_read.stop()
+
+
+def create_tello():
+    """Retorna um SimTello se a variável TELLO_SIM tiver o IP do simulador,
+    senão o Tello real."""
+    host = os.environ.get("TELLO_SIM")
+    if host:
+        print(f"Usando o simulador do Tello em {host}")
+        return SimTello(host)
+    return Tello()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local do Tello")
+    parser.add_argument("--video", help="arquivo MP4/H.264 transmitido como stream de vídeo")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--command-port", type=int, default=COMMAND_PORT)
+    parser.add_argument("--state-port", type=int, default=STATE_PORT)
+    parser.add_argument("--video-port", type=int, default=VIDEO_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso das respostas (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="atraso extra aleatório (s)")
+    parser.add_argument("--loss", type=float, default=0.0, help="probabilidade de perder um comando")
+    parser.add_argument("--state-rate", type=float, default=10.0, help="pacotes de estado por segundo")
+    parser.add_argument("--move-speed", type=float, default=100.0, help="velocidade dos movimentos (cm/s)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    simulator = TelloSimulator(
+        video_path=args.video, host=args.host, command_port=args.command_port,
+        state_port=args.state_port, video_port=args.video_port, latency=args.latency,
+        jitter=args.jitter, loss=args.loss, state_rate=args.state_rate,
+        move_speed=args.move_speed, seed=args.seed,
+    )
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nSimulador encerrado")
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
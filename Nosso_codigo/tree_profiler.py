@@ -0,0 +1,119 @@
+"""Perfil do tick da árvore de comportamento, por comportamento.
+
+O TreeProfiler é um visitor do py_trees: a BehaviourTree o chama logo depois
+de cada comportamento tickado. O tempo entre uma visita e a anterior (ou o
+início do tick) é o que aquele comportamento gastou no tick: initialise(),
+update() e, se terminou, terminate(). As mudanças de status (RUNNING ->
+SUCCESS...) também são contadas.
+
+Cada amostra vai para um histograma de intervalos logarítmicos de tamanho
+fixo (4 por oitava, de 10 µs a 10 s): registrar custa uma busca binária e
+uma soma, sem guardar as amostras, então o perfil pode ficar ligado durante
+toda a missão. Os percentis saem do limite superior do intervalo, com erro de
+até ~19%.
+"""
+
+import bisect
+import time
+
+import py_trees
+
+# Limites superiores dos intervalos, em segundos
+EDGES = [1e-5 * 2 ** (i / 4) for i in range(81)]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (len(EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Percentil ``q`` (0-100) em segundos."""
+        if not self.count:
+            return 0.0
+        target = q / 100.0 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(EDGES[i] if i < len(EDGES) else self.max, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class TreeProfiler(py_trees.visitors.VisitorBase):
+    def __init__(self):
+        super().__init__(full=False)
+        self.histograms = {}  # nome do comportamento -> LatencyHistogram
+        self.transitions = {}  # (nome, status anterior, status novo) -> vezes
+        self.last_status = {}
+        self.tick = LatencyHistogram()
+        self.ticks = 0
+        self.first_tick = None
+        self.tick_start = 0.0
+        self.last_visit = 0.0
+
+    def attach(self, tree):
+        tree.visitors.append(self)
+        return self
+
+    def initialise(self):
+        self.tick_start = self.last_visit = time.perf_counter()
+        if self.first_tick is None:
+            self.first_tick = self.tick_start
+
+    def run(self, behaviour):
+        now = time.perf_counter()
+        histogram = self.histograms.get(behaviour.name)
+        if histogram is None:
+            histogram = self.histograms[behaviour.name] = LatencyHistogram()
+        histogram.add(now - self.last_visit)
+        self.last_visit = now
+
+        status = behaviour.status
+        last = self.last_status.get(behaviour.name)
+        if status != last:
+            self.last_status[behaviour.name] = status
+            key = (behaviour.name, last.value if last is not None else "-", status.value)
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+
+    def finalise(self):
+        self.tick.add(time.perf_counter() - self.tick_start)
+        self.ticks += 1
+
+    def tick_rate(self):
+        if self.first_tick is None or self.ticks < 2:
+            return 0.0
+        return self.ticks / (time.perf_counter() - self.first_tick)
+
+    def table(self):
+        """Linhas com o tempo por comportamento (ms), para o painel e o terminal."""
+        lines = [f"{'comportamento':<22}{'ticks':>7}{'p50':>8}{'p95':>8}{'máx':>8}"]
+        for name, histogram in [("tick", self.tick)] + list(self.histograms.items()):
+            lines.append(f"{name[:21]:<22}{histogram.count:>7}{1000 * histogram.percentile(50):>8.2f}"
+                         f"{1000 * histogram.percentile(95):>8.2f}{1000 * histogram.max:>8.2f}")
+        return lines
+
+    def p50s(self):
+        """Mediana de cada comportamento (ms), na ordem em que foram tickados."""
+        return [(name, 1000 * histogram.percentile(50)) for name, histogram in self.histograms.items()]
+
+    def summary(self):
+        lines = [f"Perfil da árvore: {self.ticks} ticks, {self.tick_rate():.1f} ticks/s"]
+        lines += ["  " + line for line in self.table()]
+        lines.append("  transições de status:")
+        for (name, old, new), count in self.transitions.items():
+            lines.append(f"    {name:<22} {old} -> {new}: {count}")
+        return "\n".join(lines)
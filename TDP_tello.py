@@ -1,21 +1,60 @@
-from djitellopy import Tello
 import cv2
 import mediapipe as mp
 import os
+import sys
 import time
-import threading
+
+# Os módulos auxiliares (simulador, etc.) ficam em Nosso_codigo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Nosso_codigo"))
+from capture import CaptureThread, FrameGate
+from detectors import get_hands
+from dispatcher import CommandDispatcher, is_ok
+from display import DisplaySink
+from flight_log import FlightLog, log_path
+from gesture_classifier import GESTURE_IDS, GESTURES, GestureClassifier, TDP_RULES, to_array
+from gesture_filter import HandFilters, hand_keys
+from inference_pool import InferencePool
+from rc_control import RcStreamer, hand_velocity
+from recorder import VideoRecorder, recording_path
+from roi import RoiTracker
+from telemetry import TelemetryCache
+from tello_sim import create_tello
 
 # Suprime avisos do TensorFlow Lite
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
 # Inicializa o MediaPipe para reconhecimento de mãos
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(min_detection_confidence=0.7)
+HANDS_OPTIONS = {"min_detection_confidence": 0.7}
+hands = None
 mp_draw = mp.solutions.drawing_utils
 
+# Processos de inferência em paralelo (0 = MediaPipe no próprio loop)
+INFERENCE_WORKERS = 0
+
+# Grava o vídeo bruto e o anotado em segundo plano (voo_<data>_bruto.mp4 / _anotado.mp4)
+RECORD_VIDEO = False
+
+# Registro binário do voo (voo_<data>.fdr): quadros, gestos, telemetria e comandos
+FLIGHT_LOG = True
+flight_log = None
+
+# Roda o MediaPipe só numa região em volta da mão do quadro anterior (sem o pool)
+ROI_TRACKING = False
+roi_tracker = None
+
+# O MediaPipe, o rastreador e a janela são criados aqui e não no import: com o
+# InferencePool, cada worker importa este arquivo de novo e não deve montar
+# outro grafo do MediaPipe que nunca vai usar
+def create_perception():
+    global hands, roi_tracker, display
+    hands = get_hands(**HANDS_OPTIONS)
+    roi_tracker = RoiTracker(hands)
+    display = DisplaySink("Image")
+
 # Função para conectar ao drone Tello com tentativas de reconexão
 def connect_tello():
-    tello = Tello()
+    tello = create_tello()
     while True:
         try:
             tello.connect()
@@ -27,153 +66,269 @@ def connect_tello():
             print("Tentando reconectar em 5 segundos...")
             time.sleep(5)
 
-# Conecta ao drone Tello
-tello = connect_tello()
-print("Decolar")
-tello.takeoff()
-tello.move_up(40)
+# Drone Tello conectado em main()
+tello = None
+
+# Evita rodar o MediaPipe de novo sobre o mesmo quadro
+frame_gate = FrameGate()
+last_results = None
 
-# Variável para verificar se o comando terminou
-command_is_over = True
+# Todos os comandos com resposta passam pelo despachante, criado em main()
+dispatcher = None
 current_gesture = None
 
+# Future do último pouso: um gesto de pousar mantido não enfileira outro enquanto
+# ele está pendente ou depois que o drone pousou
+landing = None
+
+# Janela de vídeo numa thread própria; TELLO_HEADLESS=1 desliga janela e desenhos
+display = None
+
+# Telemetria lida do stream de estado, sem consultar o drone a cada quadro
+telemetry = None
+last_battery = None
+
+# Classificador por tabela: mesma ordem das regras de antes, sem percorrer os landmarks um a um
+classifier = GestureClassifier(TDP_RULES)
+
+# Filtro temporal por mão: o gesto precisa aparecer em FILTER_VOTES dos últimos
+# FILTER_WINDOW quadros antes de virar comando
+FILTER_WINDOW = 5
+FILTER_VOTES = 3
+gesture_filters = HandFilters(window=FILTER_WINDOW, votes=FILTER_VOTES)
+
+# Modo contínuo: a posição da palma vira velocidade rc (esquerda/direita e
+# sobe/desce), frente/trás e girar viram velocidade fixa; pousos continuam
+# pelo despachante
+RC_MODE = False
+RC_SPEED = 50
+RC_DEADZONE = 0.15
+rc = None
+GESTURE_VELOCITIES = {
+    "move_forward": (RC_SPEED, 0),
+    "move_backward": (-RC_SPEED, 0),
+    "rotate_left": (0, -RC_SPEED),
+    "rotate_right": (0, RC_SPEED),
+}
+
 # Função para detectar gestos
 def detect_gesture(landmarks):
-    if landmarks:
-        thumb_tip = landmarks[4]
-        index_tip = landmarks[8]
-        middle_tip = landmarks[12]
-        ring_tip = landmarks[16]
-        pinky_tip = landmarks[20]
-
-        # Detecta o gesto de subir (indicador levantado)
-        if index_tip.y < thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "move_up"
-        
-        # Detecta o gesto de descer (indicador e médio levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "move_down"
-        
-        # Detecta o gesto para girar para a esquerda (indicador, médio e anelar levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y < thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "rotate_left"
-        
-        # Detecta o gesto para girar para a direita (indicador, médio, anelar e mindinho levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y < thumb_tip.y and ring_tip.y < thumb_tip.y and pinky_tip.y < thumb_tip.y:
-            return "rotate_right"
-        
-        # Detecta o gesto de pouso (todos os dedos abaixados)
-        if index_tip.y > thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y > thumb_tip.y:
-            return "land"
-        
-        # Detecta o gesto de mover para frente (indicador e mindinho levantados)
-        if index_tip.y < thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y < thumb_tip.y:
-            return "move_forward"
-        
-        # Detecta o gesto de mover para trás (thumb longe do indicador no eixo x)
-        if abs(thumb_tip.x - index_tip.x) > 0.2:  # Ajuste o valor conforme necessário
-            return "move_backward"
-        
-        # Detecta o gesto de pousar definitivamente (apenas o mindinho levantado)
-        if index_tip.y > thumb_tip.y and middle_tip.y > thumb_tip.y and ring_tip.y > thumb_tip.y and pinky_tip.y < thumb_tip.y:
-            return "land and takeoff"
-    
-    return None
-
-# Funções de controle do Tello
-def move_up():
-    print("Subir")
-    response = tello.send_command_with_return("up 20")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def move_down():
-    print("Descer")
-    response = tello.send_command_with_return("down 20")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def rotate_left():
-    print("Rotacionar para a esquerda")
-    response = tello.send_command_with_return("ccw 90")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def rotate_right():
-    print("Rotacionar para a direita")
-    response = tello.send_command_with_return("cw 90")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def move_forward():
-    print("Mover para frente")
-    response = tello.send_command_with_return("forward 40")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def move_backward():
-    print("Mover para trás")
-    response = tello.send_command_with_return("back 40")
-    print(f"Resposta do drone: {response}")
-    return response
-
-def land():
-    print("Pousar")
-    response = tello.send_command_with_return("land")
-    print(f"Resposta do drone: {response}")
-    return response
+    return classifier.classify(landmarks)
 
+# Comando enviado para cada gesto
+GESTURE_COMMANDS = {
+    "move_up": ("Subir", "up 20"),
+    "move_down": ("Descer", "down 20"),
+    "rotate_left": ("Rotacionar para a esquerda", "ccw 90"),
+    "rotate_right": ("Rotacionar para a direita", "cw 90"),
+    "move_forward": ("Mover para frente", "forward 40"),
+    "move_backward": ("Mover para trás", "back 40"),
+    "land": ("Pousar", "land"),
+}
+
+def handle_response(command, response, rtt):
+    print(f"Resposta do drone ({command}, {rtt * 1000:.0f} ms): {response}")
+    # Os comandos vão pelo despachante, então o djitellopy não sabe se o drone está
+    # no ar; o end() só pousa se is_flying estiver certo
+    if command in ("takeoff", "land") and is_ok(command, response):
+        tello.is_flying = command == "takeoff"
+    if flight_log is not None:
+        flight_log.log_command(command, response, rtt)
+
+def landing_pending():
+    if landing is None:
+        return False
+    if not landing.done():
+        return True
+    return not landing.cancelled() and is_ok("land", landing.result())
+
+# Coloca os comandos do gesto na fila do despachante
 def execute_command(gesture):
-    global command_is_over
-    if gesture == "move_up":
-        command_is_over = move_up() == "ok"
-    elif gesture == "move_down":
-        command_is_over = move_down() == "ok"
-    elif gesture == "rotate_left":
-        command_is_over = rotate_left() == "ok"
-    elif gesture == "rotate_right":
-        command_is_over = rotate_right() == "ok"
-    elif gesture == "move_forward":
-        command_is_over = move_forward() == "ok"
-    elif gesture == "move_backward":
-        command_is_over = move_backward() == "ok"
-    elif gesture == "land and takeoff":
-        command_is_over = land() == "ok"
-        time.sleep(5)
-        tello.takeoff()
-        tello.send_command_without_return('up 60')
-    elif gesture == "land":
-        command_is_over = land() == "ok"
-        
-# Loop principal para capturar o vídeo do Tello
-while True:
-    frame = tello.get_frame_read().frame
-    img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(img_rgb)
+    global landing
+    if gesture == "land and takeoff":
+        print("Pousar e decolar")
+        dispatcher.submit("land")
+        dispatcher.submit("takeoff", delay=5)
+        dispatcher.submit("up 60")
+        # Termina no ar: um pouso depois disso é um pouso novo
+        landing = None
+        return
+    message, command = GESTURE_COMMANDS[gesture]
+    print(message)
+    if command == "land":
+        landing = dispatcher.send(command)
+    else:
+        dispatcher.submit(command)
+
+# Processa um frame: detecta a mão, classifica o gesto e dispara o comando
+def process_frame(frame, seq=None):
+    global last_results
+    if frame_gate.is_new(frame, seq) or last_results is None:
+        if ROI_TRACKING:
+            last_results = roi_tracker.process(frame)
+        else:
+            img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            last_results = hands.process(img_rgb)
+    return handle_results(frame, last_results, seq)
 
+# Desenha os landmarks, classifica o gesto e dispara o comando
+def handle_results(frame, results, seq=-1):
+    global current_gesture, last_battery
+    observations = {}
+    landmarks = {}
     if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            gesture = detect_gesture(hand_landmarks.landmark)
+        for hand_landmarks, (hand, score) in zip(results.multi_hand_landmarks, hand_keys(results)):
+            if not display.headless:
+                mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+            landmarks[hand] = to_array(hand_landmarks.landmark)
+            gesture = detect_gesture(landmarks[hand])
+            observations[hand] = (GESTURE_IDS.get(gesture, 0), score)
 
-            if gesture and command_is_over:
-                print(f"Ação detectada: {gesture}")
+    active = gesture_filters.update(observations)
+    if flight_log is not None:
+        # Uma posição por mão do quadro: o filtro também guarda as mãos que sumiram
+        flight_log.log_frame(seq, [landmarks[hand] for hand in observations],
+                             [observations[hand][0] for hand in observations],
+                             [active.get(hand, 0) for hand in observations])
+    if RC_MODE:
+        send_velocity(results, active)
+
+    for gesture_id in active.values():
+        gesture = GESTURES[gesture_id] if gesture_id else None
+        if RC_MODE and gesture not in ("land", "land and takeoff"):
+            continue
+
+        # Enfileira no máximo um comando atrás do que está em execução; pousar sempre
+        # passa, a não ser que já esteja pendente ou feito
+        if gesture == "land" and landing_pending():
+            continue
+        if gesture and (dispatcher.depth == 0 or gesture == "land"):
+            print(f"Ação detectada: {gesture}")
+            if not display.headless:
                 cv2.putText(frame, f'Status: {gesture}', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                command_is_over = False  # Bloqueia novos comandos até o comando atual ser concluído
-                current_gesture = gesture
-                threading.Thread(target=execute_command, args=(gesture,)).start()
+            current_gesture = gesture
+            execute_command(gesture)
+
+    # None até chegar o primeiro pacote de estado
+    battery = telemetry.latest.battery
+    if battery is not None and battery != last_battery:
+        print("Bateria:", battery, "%")
+        last_battery = battery
+    if not display.headless:
+        text = f'Bateria: {battery}%' if battery is not None else 'Bateria: --'
+        cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    return frame
+
+# Velocidade rc a partir da posição da palma e dos gestos ativos
+def send_velocity(results, active):
+    if not results.multi_hand_landmarks:
+        # Mão perdida: para na hora, sem esperar o watchdog
+        rc.zero()
+        return
+    palm = results.multi_hand_landmarks[0].landmark[mp_hands.HandLandmark.MIDDLE_FINGER_MCP]
+    left_right, up_down = hand_velocity(palm.x, palm.y, RC_DEADZONE, RC_SPEED)
+    forward_backward = yaw = 0
+    for gesture_id in active.values():
+        fb, turn = GESTURE_VELOCITIES.get(GESTURES[gesture_id], (0, 0))
+        forward_backward += fb
+        yaw += turn
+    rc.set(left_right, forward_backward, up_down, yaw)
+
+def main():
+    global tello, dispatcher, telemetry, rc, flight_log
+
+    create_perception()
+
+    # Conecta ao drone Tello
+    tello = connect_tello()
+    telemetry = TelemetryCache(tello).start()
+    if FLIGHT_LOG:
+        flight_log = FlightLog(log_path("voo"), GESTURES, telemetry).open()
+    # Decolagem e subida também pelo despachante, para ficarem no registro de voo
+    dispatcher = CommandDispatcher(tello, on_response=handle_response).start()
+    print("Decolar")
+    for command in ("takeoff", "up 40"):
+        response = dispatcher.send(command).result()
+        if not is_ok(command, response):
+            dispatcher.stop()
+            raise Exception(f"Falha em '{command}': {response}")
+    if RC_MODE:
+        on_send = flight_log.log_rc if flight_log is not None else None
+        rc = RcStreamer(tello, on_send=on_send).start()
+
+    # Captura em thread própria; o loop espera por um quadro novo
+    capture = CaptureThread(tello.get_frame_read()).start()
+    last_seq = -1
+
+    pool = None
+    if INFERENCE_WORKERS > 0:
+        pool = InferencePool(INFERENCE_WORKERS, options=HANDS_OPTIONS).start()
 
-    battery = tello.get_battery()
-    print("Bateria:", battery, "%")
-    cv2.putText(frame, f'Bateria: {battery}%', (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-    cv2.imshow("Image", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    display.start()
+    raw_recorder = annotated_recorder = None
+    if RECORD_VIDEO:
+        raw_recorder = VideoRecorder(recording_path("voo", "bruto")).start()
+        annotated_recorder = VideoRecorder(recording_path("voo", "anotado")).start()
 
-tello.streamoff()
-cv2.destroyAllWindows()
+    # Loop principal para capturar o vídeo do Tello ('q' na janela ou Ctrl+C para sair)
+    try:
+        while not display.quit_requested:
+            if pool is None:
+                packet = capture.read(last_seq, timeout=0.1)
+                if packet is not None:
+                    last_seq = packet.seq
+                    if raw_recorder is not None:
+                        raw_recorder.write(packet.frame)
+                    frame = process_frame(packet.frame, packet.seq)
+                    display.show(frame)
+                    if annotated_recorder is not None:
+                        annotated_recorder.write(frame)
+            else:
+                # Envia o quadro novo aos workers e trata o resultado que ficou pronto
+                packet = capture.read(last_seq, timeout=0.005)
+                if packet is not None:
+                    last_seq = packet.seq
+                    if raw_recorder is not None:
+                        raw_recorder.write(packet.frame)
+                    if frame_gate.is_new(packet.frame, packet.seq):
+                        pool.submit(packet.frame, packet.seq)
+                result = pool.get(timeout=0)
+                if result is not None:
+                    frame = handle_results(result.frame, result.to_mediapipe(), result.seq)
+                    display.show(frame)
+                    if annotated_recorder is not None:
+                        annotated_recorder.write(frame)
+                    pool.release(result)
+    except KeyboardInterrupt:
+        pass
 
-# Desconecta o drone Tello
-tello.end()
+    capture.stop()
+    display.stop()
+    for recorder in (raw_recorder, annotated_recorder):
+        if recorder is not None:
+            recorder.stop()
+            print(recorder.summary())
+    if rc is not None:
+        rc.stop()
+        print(rc.summary())
+    dispatcher.stop()
+    telemetry.stop()
+    if flight_log is not None:
+        flight_log.close()
+        print(flight_log.summary())
+    print(frame_gate.summary())
+    print(display.summary())
+    print(gesture_filters.summary())
+    if ROI_TRACKING:
+        print(roi_tracker.summary())
+    print(dispatcher.summary())
+    if pool is not None:
+        print(pool.summary())
+        pool.close()
+    tello.streamoff()
 
+    # Desconecta o drone Tello
+    tello.end()
 
+if __name__ == '__main__':
+    main()